@@ -0,0 +1,214 @@
+"""
+End-to-end latency breakdown of `VieNeuTTS`: real-time factor, time to first audio,
+speech tokens/s and the time spent in each stage:
+
+    normalize -> phonemize -> template (tokenize) -> generate -> decode (codec) -> overlap_add (streaming)
+
+With `--stub` the backbone and codec are replaced by the deterministic stand-ins in
+`benchmarks/stubs.py`, so the Python stages can be tracked on a machine without weights,
+network or GPU. Results are written as JSON (tagged with the git commit) for regression tracking:
+
+    python -m benchmarks.bench_e2e --stub --output bench.json
+    python -m benchmarks.bench_e2e --backbone pnnbao-ump/VieNeu-TTS --output bench.json
+"""
+
+import argparse
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.phonemize_text import normalizer, phonemize_with_dict  # noqa: E402
+from vieneu_tts import VieNeuTTS, load_ref_codes  # noqa: E402
+from vieneu_tts.vieneu_tts import _linear_overlap_add  # noqa: E402
+
+DEFAULT_TEXTS = [
+    "Xin chào, tôi là trợ lý ảo.",
+    "Hà Nội những ngày vào thu mang một vẻ đẹp trầm mặc và cổ kính đến lạ thường. "
+    "Đi dạo quanh Hồ Gươm vào sáng sớm là trải nghiệm khó quên.",
+    "Chương trình khuyến mãi áp dụng từ ngày 15/10/2025 đến hết ngày 30/11/2025, "
+    "giảm giá 20% cho đơn hàng trên 500.000đ tại tất cả các cửa hàng trên toàn quốc.",
+]
+STAGES = ("normalize", "phonemize", "template", "generate", "decode", "overlap_add")
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parents[1],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_overlap_add(tts: VieNeuTTS, wav: np.ndarray) -> float:
+    """Replay the streaming post-processing: one overlap-add over all chunks so far per emitted chunk."""
+    stride = tts.streaming_stride_samples
+    frame_len = stride + 2 * tts.streaming_overlap_frames * tts.hop_length
+    frames = [
+        np.pad(wav[i : i + frame_len], (0, max(0, frame_len - len(wav[i : i + frame_len]))))
+        for i in range(0, max(len(wav), 1), stride)
+    ]
+    start = time.perf_counter()
+    for k in range(1, len(frames) + 1):
+        _linear_overlap_add(frames[:k], stride=stride)
+    return time.perf_counter() - start
+
+
+def run_once(tts: VieNeuTTS, text: str, ref_codes, ref_text: str) -> dict:
+    stages = dict.fromkeys(STAGES)
+
+    start = time.perf_counter()
+    normalized = [normalizer.normalize(ref_text), normalizer.normalize(text)]
+    stages["normalize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ref_phonemes, input_phonemes = (phonemize_with_dict(t, normalize=False) for t in normalized)
+    stages["phonemize"] = time.perf_counter() - start
+
+    if tts._is_quantized_model:
+        # llama.cpp tokenizes the prompt itself: template + tokenization is part of `generate`
+        start = time.perf_counter()
+        output_str = tts._infer_ggml(ref_codes, ref_text, text)
+        stages["generate"] = time.perf_counter() - start - stages["normalize"] - stages["phonemize"]
+    else:
+        start = time.perf_counter()
+        prompt_ids = tts._build_prompt_ids(tts._prompt_prefix_ids(ref_phonemes), ref_codes, input_phonemes)
+        stages["template"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        output_str = tts._generate_from_prompt_ids(prompt_ids)
+        stages["generate"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    wav = tts._decode(output_str)
+    stages["decode"] = time.perf_counter() - start
+
+    stages["overlap_add"] = time_overlap_add(tts, wav)
+
+    # Time to first audio
+    if tts._is_quantized_model:
+        start = time.perf_counter()
+        next(iter(tts.infer_stream(text, ref_codes, ref_text)))
+        ttfa = time.perf_counter() - start
+    else:
+        # Non-streaming backbones: the whole generation happens before the first streamed chunk
+        tokens = re.findall(r"<\|speech_\d+\|>", output_str)
+        start = time.perf_counter()
+        next(tts._stream_decode(ref_codes, iter(tokens)))
+        first_chunk = time.perf_counter() - start
+        ttfa = sum(stages[s] for s in ("normalize", "phonemize", "template", "generate")) + first_chunk
+
+    n_tokens = len(re.findall(r"<\|speech_\d+\|>", output_str))
+    audio_s = len(wav) / tts.sample_rate
+    total_s = sum(v for k, v in stages.items() if v is not None and k != "overlap_add")
+    return {
+        "stages_s": stages,
+        "total_s": total_s,
+        "audio_s": audio_s,
+        "rtf": total_s / audio_s if audio_s else None,
+        "ttfa_s": ttfa,
+        "tokens": n_tokens,
+        "tokens_per_s": n_tokens / stages["generate"] if stages["generate"] else None,
+    }
+
+
+def median_of(runs: list[dict], key: str):
+    values = [r[key] for r in runs if r[key] is not None]
+    return statistics.median(values) if values else None
+
+
+def summarize(runs: list[dict]) -> dict:
+    summary = {key: median_of(runs, key) for key in ("total_s", "audio_s", "rtf", "ttfa_s", "tokens_per_s")}
+    summary["stages_s"] = {}
+    for stage in STAGES:
+        values = [r["stages_s"][stage] for r in runs if r["stages_s"][stage] is not None]
+        summary["stages_s"][stage] = statistics.median(values) if values else None
+    return summary
+
+
+def load_tts(args):
+    if args.stub:
+        from benchmarks.stubs import StubVieNeuTTS
+
+        return StubVieNeuTTS(token_latency_s=args.stub_token_ms / 1000)
+    return VieNeuTTS(
+        backbone_repo=args.backbone,
+        backbone_device=args.device,
+        codec_repo=args.codec,
+        codec_device=args.device,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end VieNeuTTS latency benchmark")
+    parser.add_argument("--text", action="append", default=None, help="Text to synthesize (repeatable).")
+    parser.add_argument("--ref-audio", default="./sample/Vĩnh (nam miền Nam).wav")
+    parser.add_argument("--ref-codes", default=None, help="Precomputed reference codes (.npy/.pt).")
+    parser.add_argument("--ref-text", default="./sample/Vĩnh (nam miền Nam).txt")
+    parser.add_argument("--backbone", default="pnnbao-ump/VieNeu-TTS")
+    parser.add_argument("--codec", default="neuphonic/neucodec")
+    parser.add_argument("--device", choices=["cpu", "cuda", "gpu"], default="cpu")
+    parser.add_argument("--stub", action="store_true", help="Use the stub backbone/codec (no weights needed).")
+    parser.add_argument(
+        "--stub-token-ms", type=float, default=0.0, help="Simulated decode time per token for the stub backbone."
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Optional path to write the JSON report.")
+    args = parser.parse_args()
+
+    tts = load_tts(args)
+    ref_text = Path(args.ref_text).read_text(encoding="utf-8")
+    ref_codes = load_ref_codes(args.ref_codes) if args.ref_codes else tts.encode_reference(args.ref_audio)
+    texts = args.text or DEFAULT_TEXTS
+
+    torch.manual_seed(0)
+    results = []
+    for text in texts:
+        for _ in range(args.warmup):
+            run_once(tts, text, ref_codes, ref_text)
+        runs = [run_once(tts, text, ref_codes, ref_text) for _ in range(args.runs)]
+        summary = summarize(runs)
+        results.append({"text": text, "chars": len(text), "summary": summary, "runs": runs})
+
+        stage_str = " ".join(
+            f"{stage}={1000 * value:.1f}ms" for stage, value in summary["stages_s"].items() if value is not None
+        )
+        print(
+            f"[{len(text):4d} chars] RTF {summary['rtf']:.3f}  TTFA {summary['ttfa_s'] * 1000:.0f}ms  "
+            f"{summary['tokens_per_s']:.1f} tok/s\n    {stage_str}"
+        )
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "mode": "stub" if args.stub else "real",
+        "backbone": None if args.stub else args.backbone,
+        "codec": None if args.stub else args.codec,
+        "device": args.device,
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "runs": args.runs,
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Per-token decode latency of the backbone: HF `generate` (dynamic cache) versus the
+fast-decode path (static KV cache + compiled single-step decode).
+
+    python -m benchmarks.bench_fast_decode --device cpu --runs 5
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from vieneu_tts import VieNeuTTS  # noqa: E402
+
+DEFAULT_TEXT = (
+    "Hà Nội những ngày vào thu mang một vẻ đẹp trầm mặc và cổ kính đến lạ thường. "
+    "Đi dạo quanh Hồ Gươm vào sáng sớm là trải nghiệm khó quên."
+)
+
+
+def time_per_token(fn, prompt_ids, runs: int) -> dict:
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        output_str = fn(prompt_ids)
+        elapsed = time.perf_counter() - start
+        n_tokens = max(output_str.count("<|speech_"), 1)
+        latencies.append(1000 * elapsed / n_tokens)
+    return {
+        "median_ms_per_token": statistics.median(latencies),
+        "min_ms_per_token": min(latencies),
+        "max_ms_per_token": max(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark static-cache decode against HF generate")
+    parser.add_argument("--text", default=DEFAULT_TEXT)
+    parser.add_argument("--ref-audio", default="./sample/Vĩnh (nam miền Nam).wav")
+    parser.add_argument("--ref-text", default="./sample/Vĩnh (nam miền Nam).txt")
+    parser.add_argument("--backbone", default="pnnbao-ump/VieNeu-TTS")
+    parser.add_argument("--codec", default="neuphonic/neucodec")
+    parser.add_argument("--device", choices=["cpu", "cuda"], default="cpu")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Optional path to write the JSON report.")
+    args = parser.parse_args()
+
+    tts = VieNeuTTS(
+        backbone_repo=args.backbone,
+        backbone_device=args.device,
+        codec_repo=args.codec,
+        codec_device=args.device,
+        backbone_fast_decode=True,
+    )
+    ref_text = Path(args.ref_text).read_text(encoding="utf-8")
+    ref_codes = tts.encode_reference(args.ref_audio)
+    prompt_ids = tts._apply_chat_template(ref_codes, ref_text, args.text)
+
+    # First call compiles the decode step, keep it out of the measurement
+    start = time.perf_counter()
+    tts._infer_torch_static(prompt_ids)
+    warmup_s = time.perf_counter() - start
+
+    torch.manual_seed(0)
+    report = {
+        "device": args.device,
+        "prompt_tokens": len(prompt_ids),
+        "compile_warmup_s": warmup_s,
+        "generate": time_per_token(tts._infer_torch, prompt_ids, args.runs),
+        "fast_decode": time_per_token(tts._infer_torch_static, prompt_ids, args.runs),
+    }
+    report["speedup"] = (
+        report["generate"]["median_ms_per_token"] / report["fast_decode"]["median_ms_per_token"]
+    )
+
+    print(
+        f"generate    : {report['generate']['median_ms_per_token']:.2f} ms/token\n"
+        f"fast decode : {report['fast_decode']['median_ms_per_token']:.2f} ms/token "
+        f"(compile warmup {warmup_s:.1f}s)\n"
+        f"speedup     : {report['speedup']:.2f}x"
+    )
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
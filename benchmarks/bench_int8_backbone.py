@@ -0,0 +1,157 @@
+"""
+Compare the fp32 and int8 (dynamic quantization) transformers backbones on CPU.
+
+For every sample voice this reports generation throughput (speech tokens/s),
+resident memory after loading, and a speech-token agreement score: the fp32
+generation is replayed through both models (teacher forcing) and we measure how
+often the int8 model picks the same greedy next token as fp32.
+
+    python -m benchmarks.bench_int8_backbone --text "Xin chào các bạn."
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from vieneu_tts import VieNeuTTS  # noqa: E402
+
+DEFAULT_TEXT = (
+    "Các khóa học trực tuyến đang giúp học sinh tiếp cận kiến thức mọi lúc mọi nơi. "
+    "Giáo viên sử dụng video, bài tập tương tác và thảo luận trực tuyến để nâng cao hiệu quả học tập."
+)
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource
+
+        # ru_maxrss is the peak (kB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def list_sample_voices(sample_dir: Path) -> List[Dict[str, str]]:
+    voices = []
+    for wav_path in sorted(sample_dir.glob("*.wav")):
+        txt_path = wav_path.with_suffix(".txt")
+        if txt_path.exists():
+            voices.append({
+                "name": wav_path.stem,
+                "audio": str(wav_path),
+                "text": txt_path.read_text(encoding="utf-8"),
+            })
+    return voices
+
+
+def generate(tts: VieNeuTTS, prompt_ids: List[int], seed: int):
+    """Sample speech tokens with the same settings as `VieNeuTTS._infer_torch`."""
+    torch.manual_seed(seed)
+    prompt_tensor = torch.tensor(prompt_ids).unsqueeze(0)
+    speech_end_id = tts.tokenizer.convert_tokens_to_ids("<|SPEECH_GENERATION_END|>")
+    start = time.perf_counter()
+    with torch.no_grad():
+        output = tts.backbone.generate(
+            prompt_tensor,
+            max_length=tts.max_context,
+            eos_token_id=speech_end_id,
+            do_sample=True,
+            temperature=1.0,
+            top_k=50,
+            use_cache=True,
+            min_new_tokens=50,
+        )
+    elapsed = time.perf_counter() - start
+    return output[0], output.shape[-1] - prompt_tensor.shape[-1], elapsed
+
+
+def greedy_predictions(backbone, sequence: torch.Tensor, prompt_len: int) -> torch.Tensor:
+    """Greedy next-token predictions for the generated part of `sequence`."""
+    with torch.no_grad():
+        logits = backbone(sequence.unsqueeze(0)).logits[0]
+    return logits[prompt_len - 1 : -1].argmax(dim=-1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark int8 vs fp32 backbone on CPU")
+    parser.add_argument("--text", default=DEFAULT_TEXT, help="Text to synthesize for every voice.")
+    parser.add_argument("--sample-dir", default="./sample", help="Directory with <voice>.wav/.txt pairs.")
+    parser.add_argument("--backbone", default="pnnbao-ump/VieNeu-TTS", help="Backbone repository ID or local path.")
+    parser.add_argument("--codec", default="neuphonic/neucodec", help="Codec repository ID or local path.")
+    parser.add_argument("--max-voices", type=int, default=None, help="Only benchmark the first N voices.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Optional path to write the JSON report.")
+    args = parser.parse_args()
+
+    voices = list_sample_voices(Path(args.sample_dir))[: args.max_voices]
+    if not voices:
+        raise FileNotFoundError(f"No reference voices found in {args.sample_dir}")
+
+    rss_start = rss_mb()
+    fp32 = VieNeuTTS(backbone_repo=args.backbone, codec_repo=args.codec)
+    rss_fp32 = rss_mb()
+
+    prompts = []
+    for voice in voices:
+        ref_codes = fp32.encode_reference(voice["audio"])
+        prompts.append(fp32._apply_chat_template(ref_codes, voice["text"], args.text))
+
+    fp32_runs = [generate(fp32, ids, args.seed) for ids in prompts]
+
+    # Keep only the fp32 backbone around for teacher forcing, drop the rest before measuring int8
+    fp32_backbone = fp32.backbone
+    del fp32
+    gc.collect()
+
+    rss_before_int8 = rss_mb()
+    int8 = VieNeuTTS(backbone_repo=args.backbone, codec_repo=args.codec, backbone_quantization="int8")
+    rss_int8 = rss_mb()
+
+    report = {"text": args.text, "voices": []}
+    for voice, ids, (sequence, n_fp32, t_fp32) in zip(voices, prompts, fp32_runs):
+        _, n_int8, t_int8 = generate(int8, ids, args.seed)
+        ref_pred = greedy_predictions(fp32_backbone, sequence, len(ids))
+        int8_pred = greedy_predictions(int8.backbone, sequence, len(ids))
+        agreement = (ref_pred == int8_pred).float().mean().item()
+        row = {
+            "voice": voice["name"],
+            "fp32_tokens_per_s": n_fp32 / t_fp32,
+            "int8_tokens_per_s": n_int8 / t_int8,
+            "speech_token_agreement": agreement,
+        }
+        report["voices"].append(row)
+        print(
+            f"{voice['name']:<24} fp32 {row['fp32_tokens_per_s']:7.1f} tok/s | "
+            f"int8 {row['int8_tokens_per_s']:7.1f} tok/s | agreement {agreement:.3f}"
+        )
+
+    report["fp32_rss_mb"] = rss_fp32 - rss_start
+    report["int8_rss_mb"] = rss_int8 - rss_before_int8
+    report["mean_speedup"] = sum(
+        r["int8_tokens_per_s"] / r["fp32_tokens_per_s"] for r in report["voices"]
+    ) / len(report["voices"])
+    report["mean_agreement"] = sum(r["speech_token_agreement"] for r in report["voices"]) / len(report["voices"])
+
+    print(
+        f"RSS after load: fp32 {report['fp32_rss_mb']:.0f} MB | int8 {report['int8_rss_mb']:.0f} MB\n"
+        f"Mean speedup: {report['mean_speedup']:.2f}x | mean agreement: {report['mean_agreement']:.3f}"
+    )
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Speed and quality of `utils.resample` against the previous resampling paths:
+`np.interp` (old DualTTS English segments) and `librosa.resample` (old reference ingestion).
+
+Quality is measured on pure tones: the error against the analytic tone for an in-band
+frequency, and the residual level of an out-of-band tone that should be filtered (aliasing).
+
+    python -m benchmarks.bench_resample --seconds 30 --runs 5
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.resample import StreamingResampler, resample  # noqa: E402
+
+# (src_sr, dst_sr) pairs used in the project
+RATE_PAIRS = [
+    (22050, 24000),  # Coqui VITS English segments -> VieNeu output rate
+    (44100, 16000),  # reference audio -> codec encoder rate
+    (24000, 8000),  # VieNeu output -> telephony
+]
+
+
+def interp_resample(wav, src_sr, dst_sr):
+    ratio = dst_sr / src_sr
+    return np.interp(np.arange(0, len(wav) * ratio) / ratio, np.arange(0, len(wav)), wav).astype(np.float32)
+
+
+def streaming_resample(wav, src_sr, dst_sr, chunk=4800):
+    resampler = StreamingResampler(src_sr, dst_sr)
+    out = [resampler.process(wav[i : i + chunk]) for i in range(0, len(wav), chunk)]
+    out.append(resampler.flush())
+    return np.concatenate(out)
+
+
+def get_methods():
+    methods = {
+        "np.interp": interp_resample,
+        "polyphase": resample,
+        "polyphase_stream": streaming_resample,
+    }
+    try:
+        import librosa
+
+        methods["librosa"] = lambda wav, src_sr, dst_sr: librosa.resample(wav, orig_sr=src_sr, target_sr=dst_sr)
+    except ImportError:
+        print("librosa not installed, skipping it")
+    return methods
+
+
+def tone(freq, sr, seconds):
+    t = np.arange(int(sr * seconds)) / sr
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def quality(fn, src_sr, dst_sr) -> dict:
+    seconds = 1.0
+    nyquist = min(src_sr, dst_sr) / 2
+    # In-band tone: compare with the analytic tone at the output rate, away from the edges
+    in_band = 0.3 * nyquist
+    out = fn(tone(in_band, src_sr, seconds), src_sr, dst_sr)
+    expected = tone(in_band, dst_sr, seconds)
+    n = min(len(out), len(expected))
+    edge = dst_sr // 20
+    err = out[edge : n - edge] - expected[edge : n - edge]
+    snr_db = 10 * np.log10(np.mean(expected[edge : n - edge] ** 2) / max(np.mean(err**2), 1e-20))
+
+    result = {"in_band_snr_db": float(snr_db)}
+    if dst_sr < src_sr:
+        # Out-of-band tone: anything left at the output is aliasing
+        out_band = min(1.5 * nyquist, 0.45 * src_sr)
+        leaked = fn(tone(out_band, src_sr, seconds), src_sr, dst_sr)[edge:-edge]
+        result["alias_rejection_db"] = float(-10 * np.log10(max(np.mean(leaked**2), 1e-20) / 0.125))
+    return result
+
+
+def speed(fn, src_sr, dst_sr, seconds, runs) -> dict:
+    wav = np.random.default_rng(0).standard_normal(int(src_sr * seconds)).astype(np.float32) * 0.1
+    fn(wav[:src_sr], src_sr, dst_sr)  # warm up filter caches
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(wav, src_sr, dst_sr)
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {"median_ms": 1000 * median, "x_realtime": seconds / median}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark resampling paths")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Length of the timed signal.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Optional path to write the JSON report.")
+    args = parser.parse_args()
+
+    methods = get_methods()
+    report = {}
+    for src_sr, dst_sr in RATE_PAIRS:
+        pair = f"{src_sr}->{dst_sr}"
+        report[pair] = {}
+        print(f"\n{pair} ({args.seconds:.0f}s signal)")
+        for name, fn in methods.items():
+            stats = {**speed(fn, src_sr, dst_sr, args.seconds, args.runs), **quality(fn, src_sr, dst_sr)}
+            report[pair][name] = stats
+            alias = f", alias rejection {stats['alias_rejection_db']:6.1f} dB" if "alias_rejection_db" in stats else ""
+            print(
+                f"  {name:17s}: {stats['median_ms']:8.2f} ms ({stats['x_realtime']:7.0f}x realtime), "
+                f"SNR {stats['in_band_snr_db']:6.1f} dB{alias}"
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Deterministic stand-ins for the backbone, tokenizer and codec, so the benchmarks can run
+the Python side of VieNeuTTS (normalization, phonemization, prompt building, streaming
+post-processing) without model weights, network access or a GPU.
+
+Generated audio is not speech: token ids and waveforms are derived from the prompt, so runs
+are reproducible and have realistic shapes (50 speech tokens per second, 480-sample hop).
+"""
+
+import re
+import time
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+from vieneu_tts import VieNeuTTS
+
+_SPECIAL_TOKENS = [
+    "<|TEXT_REPLACE|>",
+    "<|SPEECH_REPLACE|>",
+    "<|TEXT_PROMPT_START|>",
+    "<|TEXT_PROMPT_END|>",
+    "<|SPEECH_GENERATION_START|>",
+    "<|SPEECH_GENERATION_END|>",
+]
+_SPECIAL_BASE = 1_000_000
+_SPEECH_BASE = 2_000_000
+_CODEBOOK_SIZE = 65536
+_TOKEN_RE = re.compile(r"<\|speech_(\d+)\|>|<\|[A-Z_]+\|>|.", re.DOTALL)
+
+
+class StubTokenizer:
+    """Character-level tokenizer that knows the VieNeu special and speech tokens."""
+
+    def convert_tokens_to_ids(self, token: str) -> int:
+        match = re.fullmatch(r"<\|speech_(\d+)\|>", token)
+        if match:
+            return _SPEECH_BASE + int(match.group(1))
+        if token in _SPECIAL_TOKENS:
+            return _SPECIAL_BASE + _SPECIAL_TOKENS.index(token)
+        return ord(token)
+
+    def encode(self, text: str, add_special_tokens: bool = True) -> list[int]:
+        return [self.convert_tokens_to_ids(m.group(0)) for m in _TOKEN_RE.finditer(text)]
+
+    def decode(self, ids, add_special_tokens: bool = False) -> str:
+        pieces = []
+        for token_id in ids:
+            token_id = int(token_id)
+            if token_id >= _SPEECH_BASE:
+                pieces.append(f"<|speech_{token_id - _SPEECH_BASE}|>")
+            elif token_id >= _SPECIAL_BASE:
+                pieces.append(_SPECIAL_TOKENS[token_id - _SPECIAL_BASE])
+            else:
+                pieces.append(chr(token_id))
+        return "".join(pieces)
+
+
+class StubBackbone:
+    """
+    Stands in for the transformers backbone in `VieNeuTTS._infer_torch`.
+
+    The number of generated speech tokens grows with the length of the text in the prompt
+    (`tokens_per_char`); `token_latency_s` optionally simulates the decode cost per token.
+    """
+
+    device = torch.device("cpu")
+
+    def __init__(self, tokens_per_char: float = 1.5, token_latency_s: float = 0.0):
+        self.tokens_per_char = tokens_per_char
+        self.token_latency_s = token_latency_s
+
+    def parameters(self):
+        yield torch.zeros(0, device=self.device)
+
+    def __call__(self, input_ids: torch.Tensor, past_key_values, **kwargs):
+        # Voice prefix prefill (`VieNeuTTS._prompt_prefix`): the stub keeps no KV state
+        return SimpleNamespace(past_key_values=past_key_values)
+
+    def generate(self, input_ids: torch.Tensor, max_length: int, eos_token_id: int, min_new_tokens: int = 0, **kwargs):
+        prompt = input_ids[0].tolist()
+        start = prompt.index(_SPECIAL_BASE + _SPECIAL_TOKENS.index("<|TEXT_PROMPT_START|>"))
+        end = prompt.index(_SPECIAL_BASE + _SPECIAL_TOKENS.index("<|TEXT_PROMPT_END|>"))
+        n_new = max(min_new_tokens, int((end - start - 1) * self.tokens_per_char))
+        n_new = min(n_new, max_length - len(prompt) - 1)
+
+        rng = np.random.default_rng(zlib.crc32(np.asarray(prompt, dtype=np.int64).tobytes()))
+        speech = rng.integers(0, _CODEBOOK_SIZE, size=n_new) + _SPEECH_BASE
+        if self.token_latency_s:
+            time.sleep(n_new * self.token_latency_s)
+        output = prompt + speech.tolist() + [eos_token_id]
+        return torch.tensor(output, dtype=torch.long).unsqueeze(0)
+
+
+class StubCodec:
+    """Stands in for NeuCodec: one 480-sample tone burst per code, 16 kHz / 320-sample encoder hop."""
+
+    device = torch.device("cpu")
+
+    def __init__(self, hop_length: int = 480):
+        self.hop_length = hop_length
+        self._t = torch.arange(hop_length, dtype=torch.float32) / 24000
+
+    def decode_code(self, codes: torch.Tensor) -> torch.Tensor:
+        freqs = 100.0 + (codes.float() % 400.0)  # [B, 1, T]
+        frames = 0.1 * torch.sin(2 * torch.pi * freqs.unsqueeze(-1) * self._t)  # [B, 1, T, hop]
+        return frames.flatten(start_dim=-2)
+
+    def encode_code(self, audio_or_path: torch.Tensor) -> torch.Tensor:
+        n_frames = audio_or_path.shape[-1] // 320
+        frames = audio_or_path[..., : n_frames * 320].reshape(*audio_or_path.shape[:-1], n_frames, 320)
+        return (frames.abs().mean(-1) * 1e5).long() % _CODEBOOK_SIZE
+
+
+class StubVieNeuTTS(VieNeuTTS):
+    """`VieNeuTTS` with the stub backbone and codec; everything else is the real implementation."""
+
+    def __init__(self, tokens_per_char: float = 1.5, token_latency_s: float = 0.0, **kwargs):
+        self._stub_options = {"tokens_per_char": tokens_per_char, "token_latency_s": token_latency_s}
+        super().__init__(backbone_repo="stub", codec_repo="stub", **kwargs)
+
+    def _load_backbone(self, backbone_repo, backbone_device):
+        self.tokenizer = StubTokenizer()
+        self.backbone = StubBackbone(**self._stub_options)
+
+    def _load_codec(self, codec_repo, codec_device):
+        self.codec = StubCodec(self.hop_length)
+        self._codec_encoder = self.codec
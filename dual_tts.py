@@ -12,8 +12,14 @@ import numpy as np
 import soundfile as sf
 import tempfile
 import os
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Tuple
 
+from utils.resample import resample
+
 # Try to import TTS (viXTTS). If không có, chúng ta mock để dev.
 try:
     from TTS.api import TTS as CoquiTTS
@@ -52,6 +58,37 @@ def split_text_segments(text: str):
         segments.append((cur_lang, " ".join(cur_words)))
     return segments
 
+def _merge_adjacent(segments):
+    merged = []
+    for lang, seg_text in segments:
+        if merged and merged[-1][0] == lang:
+            merged[-1] = (lang, merged[-1][1] + " " + seg_text)
+        else:
+            merged.append((lang, seg_text))
+    return merged
+
+def plan_segments(text: str, max_inline_en_words: int = 3):
+    """
+    Giống `split_text_segments` nhưng gộp để giảm số lần gọi model:
+    - Cụm tiếng Anh ngắn (<= max_inline_en_words từ có chữ cái) được giữ trong đoạn tiếng Việt,
+      vì VieNeu-TTS đọc được code-switching; chỉ cụm dài hơn mới chuyển sang English TTS.
+    - Token chỉ gồm số / ký hiệu (vd "2024", "10-15") không tính là từ tiếng Anh.
+    - Các đoạn liền kề cùng ngôn ngữ được nối lại.
+    Nếu cả câu không có tiếng Việt thì giữ nguyên cho English TTS.
+    """
+    segments = split_text_segments(text)
+    if not any(lang == "vi" for lang, _ in segments):
+        return _merge_adjacent(segments)
+
+    planned = []
+    for lang, seg_text in segments:
+        if lang == "en":
+            n_words = sum(1 for w in seg_text.split() if re.search(r"[A-Za-z]", w))
+            if n_words <= max_inline_en_words:
+                lang = "vi"
+        planned.append((lang, seg_text))
+    return _merge_adjacent(planned)
+
 def concat_audio_segments(segments_wavs, target_sr=24000, gap_s=0.05):
     """
     segments_wavs: list of numpy arrays (mono)
@@ -74,17 +111,96 @@ def concat_audio_segments(segments_wavs, target_sr=24000, gap_s=0.05):
         return np.zeros(0, dtype=np.float32)
     return np.concatenate(out)
 
+class EnglishClipCache:
+    """
+    Cache LRU (RAM) + thư mục .npy (disk, tùy chọn) cho audio các cụm tiếng Anh đã tổng hợp.
+    Key = sha1(model name + text), audio lưu ở dạng float32 24 kHz (đã resample), dùng lại trực tiếp.
+    """
+
+    def __init__(self, model_name: str, max_items: int = 256, cache_dir: str = None):
+        self.model_name = model_name
+        self.max_items = max_items
+        self.cache_dir = cache_dir
+        self._clips = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, text: str) -> str:
+        # Chuẩn hoá khoảng trắng, giữ nguyên hoa/thường (ảnh hưởng cách đọc tên riêng)
+        return hashlib.sha1(f"{self.model_name}\n{' '.join(text.split())}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _remember(self, key: str, wav: np.ndarray):
+        with self._lock:
+            self._clips[key] = wav
+            self._clips.move_to_end(key)
+            while len(self._clips) > self.max_items:
+                self._clips.popitem(last=False)
+
+    def get(self, text: str):
+        key = self._key(text)
+        with self._lock:
+            if key in self._clips:
+                self._clips.move_to_end(key)
+                return self._clips[key]
+        if self.cache_dir and os.path.exists(self._path(key)):
+            try:
+                wav = np.load(self._path(key))
+            except Exception as e:
+                print("⚠️ Không đọc được clip cache:", e)
+                return None
+            self._remember(key, wav)
+            return wav
+        return None
+
+    def put(self, text: str, wav: np.ndarray):
+        key = self._key(text)
+        wav = np.asarray(wav, dtype=np.float32)
+        wav.setflags(write=False)
+        self._remember(key, wav)
+        if self.cache_dir:
+            # Ghi file tạm rồi os.replace để tránh file hỏng khi nhiều process cùng ghi
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, wav)
+            os.replace(tmp_path, self._path(key))
+
+    def __len__(self):
+        return len(self._clips)
+
 class DualTTS:
-    def __init__(self, vieneu_tts, vixtts_model_name: str = "tts_models/en/vctk/vits"):
+    def __init__(
+        self,
+        vieneu_tts,
+        vixtts_model_name: str = "tts_models/en/vctk/vits",
+        max_inline_en_words: int = 3,
+        en_cache_size: int = 256,
+        en_cache_dir: str = None,
+    ):
         """
         vieneu_tts: instance of your VieNeuTTS (or compatible) with methods:
            - encode_reference(path) -> ref_codes
            - infer(text, ref_codes, ref_text_raw) -> numpy waveform (float32) at 24000
         vixtts_model_name: coqui TTS model name to use for English (can change)
+        max_inline_en_words: English runs up to this many words are read by VieNeu-TTS
+           inside the Vietnamese segment (see `plan_segments`); 0 routes every run to English TTS
+        en_cache_size: số clip tiếng Anh giữ trong RAM (0 = tắt cache)
+        en_cache_dir: thư mục lưu clip tiếng Anh (.npy) để dùng lại giữa các lần chạy
         """
         self.vieneu = vieneu_tts
         self.target_sr = 24000
+        self.max_inline_en_words = max_inline_en_words
+        # Hai model độc lập -> mỗi ngôn ngữ một executor riêng (1 worker, vì mỗi model không thread-safe)
+        self._vn_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dual-tts-vn")
+        self._en_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dual-tts-en")
         self.vixtts = None
+        self.en_cache = (
+            EnglishClipCache(vixtts_model_name, max_items=en_cache_size, cache_dir=en_cache_dir)
+            if en_cache_size > 0 else None
+        )
         if HAVE_COQUI:
             try:
                 # Tải model viXTTS / Coqui TTS (English)
@@ -95,15 +211,21 @@ class DualTTS:
         else:
             print("⚠️ Coqui TTS (TTS lib) không cài đặt. English TTS sẽ bị mock.")
 
-    def synthesize_segment_vn(self, text_vn: str, ref_audio_path: str, ref_text_raw: str):
+    def encode_reference(self, ref_audio_path: str):
         """
-        Gọi VieNeu TTS để tổng hợp phần tiếng Việt - trả về numpy waveform float32
+        Encode giọng tham chiếu một lần để dùng lại cho mọi đoạn tiếng Việt.
         """
-        ref_codes = None
         try:
-            ref_codes = self.vieneu.encode_reference(ref_audio_path)
+            return self.vieneu.encode_reference(ref_audio_path)
         except Exception as e:
             print("⚠️ Lỗi khi encode_reference:", e)
+            return None
+
+    def synthesize_segment_vn(self, text_vn: str, ref_codes, ref_text_raw: str):
+        """
+        Gọi VieNeu TTS để tổng hợp phần tiếng Việt - trả về numpy waveform float32
+        ref_codes: codes đã encode sẵn (xem `encode_reference`)
+        """
         wav = self.vieneu.infer(text_vn, ref_codes, ref_text_raw)
         # đảm bảo float32 numpy
         arr = np.array(wav, dtype=np.float32)
@@ -122,52 +244,75 @@ class DualTTS:
             dur = max(0.25, 0.12 * n_words)
             print(f"⚠️ ViXTTS không sẵn sàng — trả về silence {dur}s cho {[text_en]}")
             return np.zeros(int(dur * self.target_sr), dtype=np.float32)
+        if self.en_cache is not None:
+            cached = self.en_cache.get(text_en)
+            if cached is not None:
+                return cached
         # Coqui TTS trả về wav numpy & sr (tuỳ model); TTS.api.TTS.tts_to_file hoặc tts_to_numpy
         try:
             # tts_to_file tương thích nhưng để lấy numpy dùng tts.tts
             wav = self.vixtts.tts(text_en)
             # Coqui TTS tts() có thể trả về numpy array hoặc filepath; handle both
             if isinstance(wav, str) and os.path.exists(wav):
-                arr, sr = sf.read(wav)
-                if sr != self.target_sr:
-                    # resample if needed (try simple np.repeat/decimate if integer ratio)
-                    import math
-                    ratio = self.target_sr / sr
-                    arr = np.interp(
-                        np.arange(0, len(arr) * ratio) / ratio,
-                        np.arange(0, len(arr)),
-                        arr
-                    ).astype(np.float32)
-                return arr.astype(np.float32)
-            elif isinstance(wav, np.ndarray):
-                return wav.astype(np.float32)
+                arr, sr = sf.read(wav, dtype="float32")
+                if arr.ndim == 2:
+                    arr = arr.mean(axis=1)
             else:
-                return np.array(wav, dtype=np.float32)
+                arr = np.asarray(wav, dtype=np.float32)
+                # tts() trả về audio ở sample rate của model (vd VITS VCTK: 22050 Hz)
+                sr = getattr(getattr(self.vixtts, "synthesizer", None), "output_sample_rate", self.target_sr)
+            # Resample polyphase (filter cache theo cặp sample rate) về 24 kHz
+            arr = resample(arr, sr, self.target_sr)
         except Exception as e:
             print("⚠️ Lỗi khi synthesize EN with viXTTS:", e)
             return np.zeros(0, dtype=np.float32)
+        if self.en_cache is not None:
+            self.en_cache.put(text_en, arr)
+        return arr
 
-    def synthesize_dual(self, full_text: str, ref_audio_path: str, ref_text_raw: str) -> Tuple[np.ndarray, int]:
+    def synthesize_dual(self, full_text: str, ref_audio_path: str, ref_text_raw: str, ref_codes=None) -> Tuple[np.ndarray, int]:
         """
         Main: tách chuỗi, synth mỗi đoạn phù hợp, ghép lại.
+        Đoạn VN và EN chạy song song trên 2 executor riêng, kết quả ghép lại theo đúng thứ tự.
+        ref_codes: nếu đã encode sẵn thì bỏ qua bước encode ref_audio_path.
         Trả về (wav_array (float32), samplerate)
         """
-        segments = split_text_segments(full_text)
-        wav_segments = []
+        segments = [
+            (lang, seg_text)
+            for lang, seg_text in plan_segments(full_text, self.max_inline_en_words)
+            if seg_text.strip()
+        ]
+        if ref_codes is None and any(lang == "vi" for lang, _ in segments):
+            # Encode giọng tham chiếu đúng một lần cho cả câu
+            ref_codes = self.encode_reference(ref_audio_path)
+
+        futures = []
         for lang, seg_text in segments:
             if lang == "vi":
-                if seg_text.strip():
-                    print("🔊 Synth VN segment:", seg_text)
-                    wav_vn = self.synthesize_segment_vn(seg_text, ref_audio_path, ref_text_raw)
-                    wav_segments.append(wav_vn)
+                print("🔊 Synth VN segment:", seg_text)
+                futures.append(self._vn_executor.submit(self.synthesize_segment_vn, seg_text, ref_codes, ref_text_raw))
             else:  # en
-                if seg_text.strip():
+                cached = self.en_cache.get(seg_text) if self.en_cache is not None and self.vixtts is not None else None
+                if cached is not None:
+                    # Cache hit: ghép thẳng audio, không qua executor
+                    print("♻️ Cached EN segment:", seg_text)
+                    futures.append(cached)
+                else:
                     print("🔊 Synth EN segment:", seg_text)
-                    wav_en = self.synthesize_segment_en(seg_text)
-                    wav_segments.append(wav_en)
+                    futures.append(self._en_executor.submit(self.synthesize_segment_en, seg_text))
+        wav_segments = [f.result() if isinstance(f, Future) else f for f in futures]
         out = concat_audio_segments(wav_segments, target_sr=self.target_sr, gap_s=0.06)
         return out, self.target_sr
 
+    def close(self):
+        self._vn_executor.shutdown(wait=True)
+        self._en_executor.shutdown(wait=True)
+
 # Convenience factory
-def make_dual_tts(vieneu_tts, vixtts_model_name="tts_models/en/vctk/vits"):
-    return DualTTS(vieneu_tts, vixtts_model_name=vixtts_model_name)
+def make_dual_tts(vieneu_tts, vixtts_model_name="tts_models/en/vctk/vits", max_inline_en_words=3, en_cache_dir=None):
+    return DualTTS(
+        vieneu_tts,
+        vixtts_model_name=vixtts_model_name,
+        max_inline_en_words=max_inline_en_words,
+        en_cache_dir=en_cache_dir,
+    )
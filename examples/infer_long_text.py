@@ -1,63 +1,17 @@
 import argparse
 import os
-import re
 import sys
 from pathlib import Path
 from typing import List
 import numpy as np
 import soundfile as sf
 import torch
+from utils.audio_output import crossfade_concat
+from utils.synthesis_cache import SynthesisManifest, voice_id
+from utils.text_chunking import split_text_into_chunks
 from vieneu_tts import VieNeuTTS
 
 
-def split_text_into_chunks(text: str, max_chars: int = 256) -> List[str]:
-    """
-    Split raw text into chunks no longer than max_chars.
-    Preference is given to sentence boundaries; otherwise falls back to word-based splitting.
-    """
-    sentences = re.split(r"(?<=[\.\!\?\…])\s+", text.strip())
-    chunks: List[str] = []
-    buffer = ""
-
-    def flush_buffer():
-        nonlocal buffer
-        if buffer:
-            chunks.append(buffer.strip())
-            buffer = ""
-
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
-
-        # If single sentence already fits, try to append to current buffer
-        if len(sentence) <= max_chars:
-            candidate = f"{buffer} {sentence}".strip() if buffer else sentence
-            if len(candidate) <= max_chars:
-                buffer = candidate
-            else:
-                flush_buffer()
-                buffer = sentence
-            continue
-
-        # Fallback: sentence too long, break by words
-        flush_buffer()
-        words = sentence.split()
-        current = ""
-        for word in words:
-            candidate = f"{current} {word}".strip() if current else word
-            if len(candidate) > max_chars and current:
-                chunks.append(current.strip())
-                current = word
-            else:
-                current = candidate
-        if current:
-            chunks.append(current.strip())
-
-    flush_buffer()
-    return [chunk for chunk in chunks if chunk]
-
-
 def infer_long_text(
     text: str,
     ref_audio_path: str,
@@ -68,10 +22,19 @@ def infer_long_text(
     backbone_repo: str = "pnnbao-ump/VieNeu-TTS",
     codec_repo: str = "neuphonic/neucodec",
     device: str | None = None,
+    cache_dir: str | None = None,
+    prune_cache: bool = False,
+    crossfade_ms: float = 10.0,
 ) -> str:
     """
     Generate speech for long-form text by chunking into manageable segments.
 
+    With `cache_dir`, every chunk's audio is stored in a synthesis manifest keyed by its
+    normalized text, the voice, the models and `max_chars`. Re-running on an edited document
+    only synthesizes new or changed chunks (chunks never span a blank line, so an edit only
+    reflows its own paragraph). `prune_cache` drops cached chunks the document no longer uses.
+    Chunks are joined with a `crossfade_ms` crossfade.
+
     Returns:
         The path to the combined audio file.
     """
@@ -84,7 +47,7 @@ def infer_long_text(
     if not raw_text:
         raise ValueError("Input text is empty.")
 
-    chunks = split_text_into_chunks(raw_text, max_chars=max_chars)
+    chunks = split_text_into_chunks(raw_text, max_chars=max_chars, keep_paragraphs=cache_dir is not None)
     if not chunks:
         raise ValueError("Text could not be segmented into valid chunks.")
 
@@ -95,28 +58,51 @@ def infer_long_text(
 
     ref_text_raw = Path(ref_text_path).read_text(encoding="utf-8")
 
-    tts = VieNeuTTS(
-        backbone_repo=backbone_repo,
-        backbone_device=device,
-        codec_repo=codec_repo,
-        codec_device=device,
-    )
-
-    print("🎧 Encoding reference audio...")
-    ref_codes = tts.encode_reference(ref_audio_path)
-
-    generated_segments: List[np.ndarray] = []
-
-    for idx, chunk in enumerate(chunks, start=1):
-        print(f"🎙️ Chunk {idx}/{len(chunks)} | {len(chunk)} chars")
-        wav = tts.infer(chunk, ref_codes, ref_text_raw)
-        generated_segments.append(wav)
-
+    generated_segments: List[np.ndarray | None] = [None] * len(chunks)
+    manifest = None
+    if cache_dir:
+        manifest = SynthesisManifest(
+            cache_dir,
+            model={"backbone": backbone_repo, "codec": codec_repo},
+            params={"max_chars": max_chars},
+        )
+        voice = voice_id(ref_audio_path, ref_text_raw)
+        keys = [manifest.key(chunk, voice) for chunk in chunks]
+        generated_segments = [manifest.get(key) for key in keys]
+        print(f"♻️ Reusing {manifest.hits}/{len(chunks)} cached chunks from {cache_dir}")
+
+    todo = [idx for idx, wav in enumerate(generated_segments) if wav is None]
+    if todo:
+        tts = VieNeuTTS(
+            backbone_repo=backbone_repo,
+            backbone_device=device,
+            codec_repo=codec_repo,
+            codec_device=device,
+        )
+
+        print("🎧 Encoding reference audio...")
+        ref_codes = tts.encode_reference(ref_audio_path)
+
+        for n, idx in enumerate(todo, start=1):
+            print(f"🎙️ Chunk {idx + 1}/{len(chunks)} ({n}/{len(todo)} to synthesize) | {len(chunks[idx])} chars")
+            wav = tts.infer(chunks[idx], ref_codes, ref_text_raw)
+            generated_segments[idx] = wav
+            if manifest is not None:
+                # Persist every chunk as soon as it exists, so an interrupted run keeps its progress
+                manifest.put(keys[idx], chunks[idx], wav)
+                manifest.save()
+
+    if manifest is not None:
+        if prune_cache:
+            print(f"🧹 Pruned {manifest.prune(set(keys))} unused cached chunks")
+        manifest.save()
+
+    for idx, wav in enumerate(generated_segments, start=1):
         if chunk_dir:
             chunk_path = os.path.join(chunk_dir, f"chunk_{idx:03d}.wav")
             sf.write(chunk_path, wav, 24_000)
 
-    combined_audio = np.concatenate(generated_segments)
+    combined_audio = crossfade_concat(generated_segments, sample_rate=24_000, crossfade_ms=crossfade_ms)
     os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
     sf.write(output_path, combined_audio, 24_000)
 
@@ -161,6 +147,22 @@ def parse_args() -> argparse.Namespace:
         default=256,
         help="Maximum characters per chunk before TTS inference.",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for the chunk synthesis cache; re-runs only synthesize new or edited chunks.",
+    )
+    parser.add_argument(
+        "--prune-cache",
+        action="store_true",
+        help="Remove cached chunks that are not part of this document.",
+    )
+    parser.add_argument(
+        "--crossfade-ms",
+        type=float,
+        default=10.0,
+        help="Crossfade between consecutive chunks in milliseconds (0 = plain concatenation).",
+    )
     parser.add_argument(
         "--device",
         choices=["auto", "cuda", "cpu"],
@@ -215,6 +217,9 @@ def main():
         backbone_repo=args.backbone,
         codec_repo=args.codec,
         device=device,
+        cache_dir=args.cache_dir,
+        prune_cache=args.prune_cache,
+        crossfade_ms=args.crossfade_ms,
     )
 
 
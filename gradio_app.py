@@ -1,11 +1,13 @@
 import gradio as gr
-import soundfile as sf
-import tempfile
 import torch
 from vieneu_tts import VieNeuTTS
 import os
 import time
+import hashlib
+import threading
+from collections import OrderedDict
 from dual_tts import make_dual_tts
+from utils.text_chunking import split_text_into_chunks
 import numpy as np
 
 print("⏳ Đang khởi động VieNeu-TTS...")
@@ -36,11 +38,14 @@ try:
 except Exception as e:
     print(f"⚠️ Không thể tải model (Chế độ UI Demo): {e}")
     class MockTTS:
+        supports_streaming = False
         def encode_reference(self, path): return None
         def infer(self, text, ref, ref_text): 
             import numpy as np
             time.sleep(1.5)
             return np.random.uniform(-0.5, 0.5, 24000*3)
+        def infer_batch(self, texts, ref, ref_text):
+            return [self.infer(t, ref, ref_text) for t in texts]
     tts = MockTTS()
 
 
@@ -58,6 +63,10 @@ VOICE_SAMPLES = {
     "Dung (nữ miền Nam)": {"audio": "./sample/Dung (nữ miền Nam).wav", "text": "./sample/Dung (nữ miền Nam).txt"}
 }
 
+# Mỗi đoạn gửi vào model tối đa 250 ký tự; văn bản dài hơn được tách theo câu phía server
+CHUNK_MAX_CHARS = 250
+MAX_TEXT_CHARS = 3000
+
 # --- 3. HELPER FUNCTIONS ---
 def load_reference_info(voice_choice):
     if voice_choice in VOICE_SAMPLES:
@@ -74,58 +83,111 @@ def load_reference_info(voice_choice):
             return None, f"❌ Lỗi: {str(e)}"
     return None, ""
 
-def synthesize_speech(text, voice_choice, custom_audio, custom_text, mode_tab):
+# Ref codes của giọng mẫu được encode một lần lúc khởi động
+PRESET_REFS = {}
+for _voice, _paths in VOICE_SAMPLES.items():
+    try:
+        with open(_paths["text"], "r", encoding="utf-8") as f:
+            PRESET_REFS[_voice] = (tts.encode_reference(_paths["audio"]), f.read())
+    except Exception as e:
+        print(f"⚠️ Không encode được giọng mẫu {_voice}: {e}")
+print(f"✅ Đã encode sẵn {len(PRESET_REFS)} giọng mẫu")
+
+# Ref codes của giọng tùy chỉnh, cache theo nội dung audio (LRU nhỏ)
+CUSTOM_REFS_MAX = 16
+CUSTOM_REFS = OrderedDict()
+CUSTOM_REFS_LOCK = threading.Lock()
+
+def get_custom_ref_codes(custom_audio):
+    sample_rate, data = custom_audio
+    key = hashlib.sha1(np.ascontiguousarray(data).tobytes() + str(sample_rate).encode()).hexdigest()
+    with CUSTOM_REFS_LOCK:
+        if key in CUSTOM_REFS:
+            CUSTOM_REFS.move_to_end(key)
+            return CUSTOM_REFS[key]
+    ref_codes = tts.encode_reference(custom_audio)
+    with CUSTOM_REFS_LOCK:
+        CUSTOM_REFS[key] = ref_codes
+        while len(CUSTOM_REFS) > CUSTOM_REFS_MAX:
+            CUSTOM_REFS.popitem(last=False)
+    return ref_codes
+
+def resolve_reference(voice_choice, custom_audio, custom_text, mode_tab):
+    """Trả về (ref_codes, ref_text, lỗi)"""
+    if mode_tab == "custom_mode":
+        if custom_audio is None or not custom_text:
+            return None, None, "⚠️ Vui lòng tải lên Audio và nhập nội dung Audio đó."
+        print("🎨 Mode: Custom Voice")
+        return get_custom_ref_codes(custom_audio), custom_text, None
+
+    if voice_choice not in VOICE_SAMPLES:
+        return None, None, "⚠️ Vui lòng chọn một giọng mẫu."
+    if voice_choice not in PRESET_REFS:
+        return None, None, f"❌ Không tìm thấy file audio: {VOICE_SAMPLES[voice_choice]['audio']}"
+    print(f"🎤 Mode: Preset Voice ({voice_choice})")
+    ref_codes, ref_text_raw = PRESET_REFS[voice_choice]
+    return ref_codes, ref_text_raw, None
+
+def synthesize_speech(text, voice_choice, custom_audio, custom_text, mode_tab, use_streaming):
+    """
+    Generator cho 3 output: (audio streaming, audio đầy đủ, trạng thái).
+    Chế độ streaming trả từng đoạn audio ngay khi tạo xong.
+    """
     try:
         if not text or text.strip() == "":
-            return None, "⚠️ Vui lòng nhập văn bản cần tổng hợp!"
-        
-        # --- LOGIC CHECK LIMIT 250 ---
-        if len(text) > 250:
-            return None, f"❌ Văn bản quá dài ({len(text)}/250 ký tự)! Vui lòng cắt ngắn lại để đảm bảo chất lượng."
-
-        # Logic chọn Reference
-        if mode_tab == "custom_mode": 
-            if custom_audio is None or not custom_text:
-                return None, "⚠️ Vui lòng tải lên Audio và nhập nội dung Audio đó."
-            ref_audio_path = custom_audio
-            ref_text_raw = custom_text
-            print("🎨 Mode: Custom Voice")
-        else: # Preset
-            if voice_choice not in VOICE_SAMPLES:
-                 return None, "⚠️ Vui lòng chọn một giọng mẫu."
-            ref_audio_path = VOICE_SAMPLES[voice_choice]["audio"]
-            ref_text_path = VOICE_SAMPLES[voice_choice]["text"]
-            
-            if not os.path.exists(ref_audio_path):
-                 return None, f"❌ Không tìm thấy file audio: {ref_audio_path}"
-                 
-            with open(ref_text_path, "r", encoding="utf-8") as f:
-                ref_text_raw = f.read()
-            print(f"🎤 Mode: Preset Voice ({voice_choice})")
-
-        # Inference & Đo thời gian
-        print(f"📝 Text: {text[:50]}...")
-        
+            yield gr.update(), None, "⚠️ Vui lòng nhập văn bản cần tổng hợp!"
+            return
+
+        if len(text) > MAX_TEXT_CHARS:
+            yield gr.update(), None, f"❌ Văn bản quá dài ({len(text)}/{MAX_TEXT_CHARS} ký tự)!"
+            return
+
+        ref_codes, ref_text_raw, error = resolve_reference(voice_choice, custom_audio, custom_text, mode_tab)
+        if error:
+            yield gr.update(), None, error
+            return
+
+        # Tách câu phía server cho văn bản dài
+        chunks = split_text_into_chunks(text, max_chars=CHUNK_MAX_CHARS)
+        print(f"📝 Text: {text[:50]}... ({len(chunks)} đoạn)")
+        if not chunks:
+            yield gr.update(), None, "⚠️ Không tìm thấy nội dung có thể đọc trong văn bản!"
+            return
+
         start_time = time.time() # <--- Bắt đầu bấm giờ
-        
-        ref_codes = tts.encode_reference(ref_audio_path)
-        wav = tts.infer(text, ref_codes, ref_text_raw)
-        
-        end_time = time.time()   # <--- Kết thúc bấm giờ
-        process_time = end_time - start_time # <--- Tính thời gian xử lý
-        
-        # Save
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            sf.write(tmp_file.name, wav, 24000)
-            output_path = tmp_file.name
-        
-        # <--- Cập nhật thông báo kết quả
-        return output_path, f"✅ Thành công! (Mất {process_time:.2f} giây để tạo)"
+
+        if use_streaming:
+            pieces = []
+            first_audio = None
+            for i, chunk in enumerate(chunks, 1):
+                if getattr(tts, "supports_streaming", False):
+                    chunk_audio = tts.infer_stream(chunk, ref_codes, ref_text_raw)
+                else:
+                    chunk_audio = [tts.infer(chunk, ref_codes, ref_text_raw)]
+                for audio in chunk_audio:
+                    pieces.append(audio)
+                    if first_audio is None:
+                        first_audio = time.time() - start_time
+                    yield (24000, audio), gr.update(), f"🔊 Đang phát... (đoạn {i}/{len(chunks)})"
+            process_time = time.time() - start_time
+            # Stream không trả về đoạn audio nào (vd. văn bản rỗng sau khi chuẩn hóa)
+            if first_audio is None:
+                yield gr.update(), None, "⚠️ Không tạo được audio cho văn bản này!"
+                return
+            wav = np.concatenate(pieces)
+            yield gr.update(), (24000, wav), (
+                f"✅ Thành công! (Âm thanh đầu tiên sau {first_audio:.2f} giây, tổng {process_time:.2f} giây)"
+            )
+        else:
+            wav = np.concatenate(tts.infer_batch(chunks, ref_codes, ref_text_raw))
+            process_time = time.time() - start_time # <--- Tính thời gian xử lý
+            # Trả audio trực tiếp từ bộ nhớ (không ghi file tạm)
+            yield gr.update(), (24000, wav), f"✅ Thành công! (Mất {process_time:.2f} giây để tạo)"
 
     except Exception as e:
         import traceback
         traceback.print_exc()
-        return None, f"❌ Lỗi hệ thống: {str(e)}"
+        yield gr.update(), None, f"❌ Lỗi hệ thống: {str(e)}"
 
 # --- 4. UI SETUP ---
 theme = gr.themes.Ocean(
@@ -249,7 +311,7 @@ with gr.Blocks(theme=theme, css=css, title="VieNeu-TTS Studio") as demo:
             
             # Counter + Warning
             with gr.Row():
-                char_count = gr.HTML("<div style='text-align: right; color: #64748B; font-size: 0.8rem;'>0 / 250 ký tự</div>")
+                char_count = gr.HTML("<div style='text-align: right; color: #64748B; font-size: 0.8rem;'>0 ký tự</div>")
             
             gr.Markdown("### 🗣️ Chọn giọng đọc")
             with gr.Tabs() as tabs:
@@ -266,17 +328,19 @@ with gr.Blocks(theme=theme, css=css, title="VieNeu-TTS Studio") as demo:
 
                 with gr.TabItem("🎙️ Giọng tùy chỉnh (Custom)", id="custom_mode"):
                     gr.Markdown("Tải lên giọng của bạn (Zero-shot Cloning)")
-                    custom_audio = gr.Audio(label="File ghi âm (.wav)", type="filepath")
+                    custom_audio = gr.Audio(label="File ghi âm (.wav)", type="numpy")
                     custom_text = gr.Textbox(label="Nội dung ghi âm", placeholder="Nhập chính xác lời thoại...")
 
             current_mode = gr.Textbox(visible=False, value="preset_mode")
+            use_streaming = gr.Checkbox(label="⚡ Phát trực tiếp (Streaming) - nghe ngay đoạn đầu tiên", value=True)
             btn_generate = gr.Button("Tổng hợp giọng nói", variant="primary", size="lg")
 
         # --- RIGHT: OUTPUT ---
         with gr.Column(scale=2):
             gr.Markdown("### 🎧 Kết quả")
             with gr.Group():
-                audio_output = gr.Audio(label="Audio đầu ra", type="filepath", show_download_button=True, autoplay=True)
+                stream_output = gr.Audio(label="Đang phát", streaming=True, autoplay=True, interactive=False)
+                audio_output = gr.Audio(label="Audio đầu ra", type="numpy", show_download_button=True)
                 status_output = gr.Textbox(label="Trạng thái", show_label=False, elem_classes="status-box", placeholder="Sẵn sàng...")
 
     # --- EXAMPLES ---
@@ -288,15 +352,16 @@ with gr.Blocks(theme=theme, css=css, title="VieNeu-TTS Studio") as demo:
     # --- LOGIC ---
     def update_count(text):
         l = len(text)
-        if l > 250:
+        if l > MAX_TEXT_CHARS:
             color = "#dc2626" # Red
-            msg = f"⚠️ <b>{l} / 250</b> - Quá giới hạn!"
-        elif l > 200:
+            msg = f"⚠️ <b>{l} / {MAX_TEXT_CHARS}</b> - Quá giới hạn!"
+        elif l > CHUNK_MAX_CHARS:
             color = "#ea580c" # Orange
-            msg = f"{l} / 250"
+            n_chunks = len(split_text_into_chunks(text, max_chars=CHUNK_MAX_CHARS))
+            msg = f"{l} ký tự - sẽ tách thành {n_chunks} đoạn"
         else:
             color = "#64748B" # Gray
-            msg = f"{l} / 250 ký tự"
+            msg = f"{l} ký tự"
         return f"<div style='text-align: right; color: {color}; font-size: 0.8rem; font-weight: bold'>{msg}</div>"
 
     text_input.change(update_count, text_input, char_count)
@@ -318,12 +383,13 @@ with gr.Blocks(theme=theme, css=css, title="VieNeu-TTS Studio") as demo:
 
     btn_generate.click(
         fn=synthesize_speech,
-        inputs=[text_input, voice_select, custom_audio, custom_text, current_mode],
-        outputs=[audio_output, status_output]
+        inputs=[text_input, voice_select, custom_audio, custom_text, current_mode, use_streaming],
+        outputs=[stream_output, audio_output, status_output]
     )
 
 if __name__ == "__main__":
-    demo.queue().launch(
+    # Với backbone GGUF có nhiều context, xử lý song song bấy nhiêu yêu cầu
+    demo.queue(max_size=32, default_concurrency_limit=getattr(tts, "backbone_contexts", 1)).launch(
         server_name="127.0.0.1", 
         server_port=7860, 
         share=True
@@ -0,0 +1,24 @@
+import json
+
+from tools.bulk_synthesize import audio_path, completed_ids, read_records, write_manifest
+
+
+def _write_progress(path, records):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+
+
+def test_success_wins_over_error_from_later_sorted_progress_file(tmp_path):
+    wav_path = audio_path(tmp_path, "clip-1")
+    wav_path.parent.mkdir(parents=True)
+    wav_path.write_bytes(b"RIFF")
+    success = {"id": "clip-1", "voice": "v", "text": "xin chào", "path": str(wav_path.relative_to(tmp_path))}
+    error = {"id": "clip-1", "voice": "v", "error": "RuntimeError: boom"}
+
+    # A later run (worker 0) succeeded; an earlier run's worker 1 logged an error for the same id
+    _write_progress(tmp_path / "progress" / "shard0of1-worker0.jsonl", [success])
+    _write_progress(tmp_path / "progress" / "shard0of1-worker1.jsonl", [error])
+
+    assert read_records(tmp_path)["clip-1"] == success
+    assert completed_ids(tmp_path) == {"clip-1"}
+    assert write_manifest(tmp_path) == 1
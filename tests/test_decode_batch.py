@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from benchmarks.stubs import StubCodec, StubVieNeuTTS
+
+
+class _GlobalContextCodec(StubCodec):
+    """Like NeuCodec's attention decoder, every output frame depends on the whole (padded) sequence."""
+
+    def __init__(self, hop_length: int = 480):
+        super().__init__(hop_length)
+        self.calls = []
+
+    def decode_code(self, codes):
+        self.calls.append(tuple(codes.shape))
+        context = (codes.float() % 400.0).mean(dim=-1, keepdim=True) / 400.0  # [B, 1, 1]
+        return super().decode_code(codes) * (1.0 + context)
+
+
+def _snr_db(reference: np.ndarray, estimate: np.ndarray) -> float:
+    noise = np.sum((reference - estimate) ** 2)
+    return float("inf") if noise == 0 else 10 * np.log10(np.sum(reference**2) / noise)
+
+
+@pytest.fixture()
+def tts():
+    tts = StubVieNeuTTS()
+    tts.codec = _GlobalContextCodec(tts.hop_length)
+    return tts
+
+
+def test_decode_batch_matches_per_item_decode(tts):
+    rng = np.random.default_rng(0)
+    codes = [rng.integers(0, 65536, n).tolist() for n in (300, 100, 104, 108, 305)]
+
+    wavs = tts.decode_batch(codes)
+    assert len(tts.codec.calls) == 2  # [100, 104, 108] and [300, 305]
+
+    for ids, wav in zip(codes, wavs):
+        expected = tts._codec_decode(ids)
+        assert len(wav) == len(ids) * tts.hop_length
+        assert _snr_db(expected, wav) > 30
+
+
+def test_decode_batch_without_padding(tts):
+    rng = np.random.default_rng(1)
+    codes = [rng.integers(0, 65536, n).tolist() for n in (50, 50, 51)]
+
+    wavs = tts.decode_batch(codes, max_pad_ratio=0)
+    assert [shape[0] for shape in tts.codec.calls] == [2, 1]
+    for ids, wav in zip(codes, wavs):
+        np.testing.assert_allclose(wav, tts._codec_decode(ids), atol=1e-6)
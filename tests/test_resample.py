@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from utils.audio_output import StreamEncoder
+from utils.resample import StreamingResampler, resample
+
+
+def _random_chunks(wav: np.ndarray, rng: np.random.Generator) -> list[np.ndarray]:
+    chunks, pos = [], 0
+    while pos < len(wav):
+        size = int(rng.choice([0, 1, 2, 7, 31, 47, 160, 480, 1999]))
+        chunks.append(wav[pos : pos + size])
+        pos += size
+    return chunks + [wav[:0]]
+
+
+@pytest.mark.parametrize("src_sr, dst_sr", [(24000, 8000), (24000, 16000), (16000, 24000), (22050, 24000)])
+def test_streaming_matches_one_shot(src_sr, dst_sr):
+    rng = np.random.default_rng(src_sr + dst_sr)
+    wav = rng.standard_normal(9001).astype(np.float32)
+    resampler = StreamingResampler(src_sr, dst_sr)
+
+    pieces = [resampler.process(chunk) for chunk in _random_chunks(wav, rng)]
+    streamed = np.concatenate(pieces + [resampler.flush()])
+
+    expected = resample(wav, src_sr, dst_sr)
+    assert len(streamed) == len(expected)
+    np.testing.assert_allclose(streamed, expected, atol=1e-5)
+
+
+def test_stream_encoder_accepts_empty_chunk_after_input():
+    encoder = StreamEncoder("mulaw", 24000, target_sr=8000)
+    wav = np.sin(np.arange(12000, dtype=np.float32) / 10)
+    encoded = encoder.encode(wav) + encoder.encode(wav[:0]) + encoder.flush()
+    assert len(encoded) == 4000
@@ -0,0 +1,40 @@
+import threading
+
+import numpy as np
+import pytest
+
+from vieneu_tts.scheduler import Priority, Scheduler
+
+
+class _BlockingTTS:
+    """Stands in for `VieNeuTTS`: every `infer` call waits until `release` is set."""
+
+    sample_rate = 24_000
+    metrics = None
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def infer(self, text, ref_codes, ref_text, cancel=None):
+        self.started.set()
+        self.release.wait(timeout=5)
+        return np.zeros(480, dtype=np.float32)
+
+
+def test_close_fails_job_interrupted_between_chunks():
+    tts = _BlockingTTS()
+    scheduler = Scheduler(tts, max_chars=20)
+    text = "Câu thứ nhất. Câu thứ hai. Câu thứ ba. Câu thứ tư."
+    future = scheduler.submit(text, np.zeros(10, dtype=np.int64), "tham chiếu", priority=Priority.BATCH)
+
+    # Close while the first of several chunks is being synthesized
+    assert tts.started.wait(timeout=5)
+    scheduler.close(wait=False)
+    tts.release.set()
+
+    with pytest.raises(RuntimeError, match="closed"):
+        future.result(timeout=5)
+    for thread in scheduler._threads:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
@@ -0,0 +1,72 @@
+import gc
+import threading
+import time
+
+from vieneu_tts.single_flight import SingleFlight
+
+
+def _counting_stream(produced: list, stopped: threading.Event, delay: float = 0.01):
+    def make_iterator(cancel):
+        def chunks():
+            try:
+                for i in range(1000):
+                    if cancel.cancelled:
+                        return
+                    time.sleep(delay)
+                    produced.append(i)
+                    yield i
+            finally:
+                stopped.set()
+
+        return chunks()
+
+    return make_iterator
+
+
+def test_late_joiner_gets_every_chunk():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def make_iterator(cancel):
+        yield 0
+        release.wait(timeout=5)
+        yield 1
+        yield 2
+
+    first, shared_first = flight.stream("key", make_iterator)
+    assert next(first) == 0
+    second, shared_second = flight.stream("key", make_iterator)
+    release.set()
+
+    assert (shared_first, shared_second) == (False, True)
+    assert list(first) == [1, 2]
+    assert list(second) == [0, 1, 2]
+    assert flight.coalesced == 1
+
+
+def test_dropped_subscription_stops_producer():
+    flight = SingleFlight()
+    produced, stopped = [], threading.Event()
+
+    chunks, _ = flight.stream("key", _counting_stream(produced, stopped))
+    del chunks  # never iterated
+    gc.collect()
+
+    assert stopped.wait(timeout=5)
+    assert len(produced) < 1000
+
+
+def test_closing_last_subscriber_stops_producer():
+    flight = SingleFlight()
+    produced, stopped = [], threading.Event()
+
+    first, _ = flight.stream("key", _counting_stream(produced, stopped))
+    second, _ = flight.stream("key", _counting_stream(produced, stopped))
+    assert next(first) == 0
+    first.close()
+    assert next(second) == 0
+    assert not stopped.is_set()
+    second.close()
+
+    assert stopped.wait(timeout=5)
+    assert len(produced) < 1000
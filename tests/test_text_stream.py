@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from benchmarks.stubs import StubVieNeuTTS
+from vieneu_tts import CancellationToken, GenerationCancelled
+
+REF_CODES = np.arange(50)
+REF_TEXT = "tham chiếu"
+
+
+class _Producer:
+    """Endless sentence stream, like an LLM reply; records how far it was read and whether it was closed."""
+
+    def __init__(self):
+        self.pulled = 0
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        try:
+            while True:
+                time.sleep(0.002)
+                self.pulled += 1
+                yield f"Câu số {self.pulled}. "
+        finally:
+            self.closed.set()
+
+    async def __aiter__(self):
+        try:
+            while True:
+                await asyncio.sleep(0.002)
+                self.pulled += 1
+                yield f"Câu số {self.pulled}. "
+        finally:
+            self.closed.set()
+
+
+def _assert_stops_pulling(producer: _Producer):
+    time.sleep(0.05)
+    pulled = producer.pulled
+    time.sleep(0.1)
+    assert producer.pulled == pulled
+
+
+@pytest.fixture()
+def tts():
+    return StubVieNeuTTS()
+
+
+def test_closing_stream_stops_reading_fragments(tts):
+    producer = _Producer()
+    audio = tts.infer_text_stream(iter(producer), REF_CODES, REF_TEXT)
+    assert len(next(audio)) > 0
+    audio.close()
+
+    assert producer.closed.wait(timeout=5)
+    _assert_stops_pulling(producer)
+
+
+def test_cancel_stops_reading_fragments(tts):
+    producer = _Producer()
+    cancel = CancellationToken()
+    audio = tts.infer_text_stream(iter(producer), REF_CODES, REF_TEXT, cancel=cancel)
+    next(audio)
+    cancel.cancel()
+
+    with pytest.raises(GenerationCancelled):
+        for _ in audio:
+            pass
+    assert producer.closed.wait(timeout=5)
+    _assert_stops_pulling(producer)
+
+
+def test_async_close_stops_reading_fragments(tts):
+    producer = _Producer()
+
+    async def consume():
+        audio = tts.ainfer_text_stream(producer, REF_CODES, REF_TEXT)
+        first = await audio.__anext__()
+        await audio.aclose()
+        await asyncio.sleep(0.05)
+        return first
+
+    assert len(asyncio.run(consume())) > 0
+    _assert_stops_pulling(producer)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from benchmarks.stubs import StubCodec, StubVieNeuTTS
+from vieneu_tts.vieneu_tts import _linear_overlap_add
+
+WINDOW, CONTEXT, OVERLAP = 10, 3, 2
+
+
+class _FrameCodec(StubCodec):
+    """Frame t decodes to `hop_length` samples equal to code t / 1000, whatever its neighbours."""
+
+    def __init__(self, hop_length: int = 480):
+        super().__init__(hop_length)
+        self.calls = []
+
+    def decode_code(self, codes):
+        self.calls.append(codes.shape[-1])
+        return codes.float().repeat_interleave(self.hop_length, dim=-1) / 1000.0
+
+
+@pytest.fixture()
+def tts():
+    tts = StubVieNeuTTS(
+        decode_window_frames=WINDOW, decode_context_frames=CONTEXT, decode_overlap_frames=OVERLAP
+    )
+    tts.codec = _FrameCodec(tts.hop_length)
+    return tts
+
+
+@pytest.mark.parametrize("n_frames", [1, WINDOW - 1, WINDOW, WINDOW + 1, 2 * WINDOW, 2 * WINDOW + 1, 5 * WINDOW, 97])
+def test_windowed_decode_matches_frames(tts, n_frames):
+    speech_ids = list(range(1, n_frames + 1))
+    wav = tts._decode_windowed(speech_ids)
+
+    assert len(wav) == n_frames * tts.hop_length
+    expected = np.repeat(np.asarray(speech_ids, dtype=np.float32) / 1000.0, tts.hop_length)
+    np.testing.assert_allclose(wav, expected, rtol=1e-5)
+    assert max(tts.codec.calls) <= WINDOW + 2 * (CONTEXT + OVERLAP)
+
+
+def test_infer_decodes_long_outputs_in_windows(tts):
+    n_frames = 200
+    tts.generate_tokens = lambda *args, **kwargs: "".join(f"<|speech_{i}|>" for i in range(n_frames))
+    wav = tts.infer("xin chào", np.arange(50), "tham chiếu")
+
+    assert len(wav) == n_frames * tts.hop_length
+    assert len(tts.codec.calls) > 1
+    assert max(tts.codec.calls) <= WINDOW + 2 * (CONTEXT + OVERLAP)
+
+
+@pytest.mark.parametrize("stride, frame_length", [(480, 960), (4800, 4800 + 2 * 960), (100, 101)])
+def test_overlap_add_of_identical_windows_reproduces_input(stride, frame_length):
+    signal = np.random.default_rng(0).standard_normal(10 * stride + frame_length).astype(np.float32)
+    frames = [signal[start : start + frame_length] for start in range(0, len(signal) - frame_length + 1, stride)]
+
+    out = _linear_overlap_add(frames, stride=stride)
+    np.testing.assert_allclose(out, signal[: len(out)], rtol=1e-4, atol=1e-5)
+    assert len(out) == (len(frames) - 1) * stride + frame_length
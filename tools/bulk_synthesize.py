@@ -0,0 +1,257 @@
+"""
+Resumable, sharded bulk synthesis of a JSONL manifest.
+
+Each input line is `{"id": ..., "text": ..., "voice": ...}`; `voice` names a reference in
+`--voices-dir` (`<voice>.wav` + `<voice>.txt`, and `<voice>.npy` codes from
+`tools.encode_voices` when present) and defaults to `--default-voice`.
+
+Work is split across machines with `--shard i/N` (by a stable hash of the id) and across
+`--workers` processes on each machine. Every finished clip is written atomically to
+`<output-dir>/audio/<id>.wav` and then appended as one line to a per-worker progress file, so
+an interrupted job resumes where it stopped: ids with a successful record are skipped.
+Failed items are recorded with their error and retried on the next run. When the workers are
+done, all progress files in the output dir are merged into `<output-dir>/manifest.jsonl`.
+
+    python -m tools.bulk_synthesize --input jobs.jsonl --output-dir ./bulk_out --workers 4
+    python -m tools.bulk_synthesize --input jobs.jsonl --output-dir /mnt/shared/out --shard 0/8
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import re
+import sys
+import time
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import soundfile as sf  # noqa: E402
+
+from utils.audio_output import crossfade_concat  # noqa: E402
+from utils.text_chunking import split_text_into_chunks  # noqa: E402
+
+SAMPLE_RATE = 24_000
+_UNSAFE_CHARS_RE = re.compile(r"[^\w.-]+")
+
+
+def read_jobs(path: str) -> list[dict]:
+    jobs, seen = [], set()
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if "id" not in job or not str(job.get("text", "")).strip():
+                raise ValueError(f"{path}:{line_no}: every job needs an `id` and a non-empty `text`.")
+            job["id"] = str(job["id"])
+            if job["id"] in seen:
+                raise ValueError(f"{path}:{line_no}: duplicate id {job['id']!r}.")
+            seen.add(job["id"])
+            jobs.append(job)
+    return jobs
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected --shard i/N, got {value!r}") from None
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Shard index must be in [0, {count}), got {index}")
+    return index, count
+
+
+def in_shard(job_id: str, index: int, count: int) -> bool:
+    """Stable across machines and input order: depends on the id only."""
+    return zlib.crc32(job_id.encode("utf-8")) % count == index
+
+
+def audio_path(output_dir: Path, job_id: str) -> Path:
+    # Ids are used as file names; the crc keeps ids that sanitize to the same name apart
+    safe = _UNSAFE_CHARS_RE.sub("_", job_id)[:100]
+    if safe != job_id:
+        safe = f"{safe}-{zlib.crc32(job_id.encode('utf-8')):08x}"
+    return output_dir / "audio" / f"{safe}.wav"
+
+
+def is_done(output_dir: Path, record: dict) -> bool:
+    return "error" not in record and (output_dir / record["path"]).exists()
+
+
+def read_records(output_dir: Path) -> dict[str, dict]:
+    """
+    One record per id from all progress files (a torn last line from a crash is ignored).
+
+    Progress files of different runs and worker splits are not ordered in time, so a success
+    whose audio exists always wins over an error; otherwise the last record read is kept.
+    """
+    records = {}
+    for progress_path in sorted((output_dir / "progress").glob("*.jsonl")):
+        with open(progress_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                previous = records.get(record["id"])
+                if previous is not None and is_done(output_dir, previous) and not is_done(output_dir, record):
+                    continue
+                records[record["id"]] = record
+    return records
+
+
+def completed_ids(output_dir: Path) -> set[str]:
+    return {job_id for job_id, record in read_records(output_dir).items() if is_done(output_dir, record)}
+
+
+def write_manifest(output_dir: Path) -> int:
+    records = [r for r in read_records(output_dir).values() if is_done(output_dir, r)]
+    records.sort(key=lambda r: r["id"])
+    tmp_path = output_dir / f"manifest.jsonl.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, output_dir / "manifest.jsonl")
+    return len(records)
+
+
+class VoiceBank:
+    """Reference codes and transcripts per voice name, encoded on first use."""
+
+    def __init__(self, tts, voices_dir: str):
+        self.tts = tts
+        self.voices_dir = Path(voices_dir)
+        self._voices = {}
+
+    def get(self, voice: str):
+        if voice not in self._voices:
+            from vieneu_tts import load_ref_codes
+
+            codes_path = self.voices_dir / f"{voice}.npy"
+            text_path = self.voices_dir / f"{voice}.txt"
+            if not text_path.exists():
+                raise FileNotFoundError(f"Reference text not found for voice {voice!r}: {text_path}")
+            if codes_path.exists():
+                ref_codes = load_ref_codes(codes_path)
+            else:
+                ref_codes = self.tts.encode_reference(str(self.voices_dir / f"{voice}.wav"))
+            self._voices[voice] = (ref_codes, text_path.read_text(encoding="utf-8"))
+        return self._voices[voice]
+
+
+def run_worker(worker: int, jobs: list[dict], args: argparse.Namespace):
+    """Synthesize `jobs` in order, appending one progress record per job."""
+    import torch
+
+    from vieneu_tts import VieNeuTTS
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    output_dir = Path(args.output_dir)
+    tts = VieNeuTTS(
+        backbone_repo=args.backbone,
+        backbone_device=args.device,
+        codec_repo=args.codec,
+        codec_device=args.device,
+    )
+    voices = VoiceBank(tts, args.voices_dir)
+
+    shard_index, shard_count = args.shard
+    progress_path = output_dir / "progress" / f"shard{shard_index}of{shard_count}-worker{worker}.jsonl"
+    with open(progress_path, "a", encoding="utf-8") as progress:
+        for n, job in enumerate(jobs, start=1):
+            voice = job.get("voice") or args.default_voice
+            path = audio_path(output_dir, job["id"])
+            start = time.perf_counter()
+            try:
+                ref_codes, ref_text = voices.get(voice)
+                chunks = split_text_into_chunks(job["text"], max_chars=args.max_chars)
+                wav = crossfade_concat(
+                    [tts.infer(chunk, ref_codes, ref_text) for chunk in chunks], sample_rate=SAMPLE_RATE
+                )
+                tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+                sf.write(tmp_path, wav, SAMPLE_RATE, format="WAV")
+                os.replace(tmp_path, path)
+                synth_s = time.perf_counter() - start
+                duration_s = len(wav) / SAMPLE_RATE
+                record = {
+                    "id": job["id"],
+                    "voice": voice,
+                    "text": job["text"],
+                    "path": str(path.relative_to(output_dir)),
+                    "duration_s": round(duration_s, 3),
+                    "synth_s": round(synth_s, 3),
+                    "rtf": round(synth_s / duration_s, 4) if duration_s else None,
+                    "chunks": len(chunks),
+                }
+                print(f"[worker {worker}] {n}/{len(jobs)} {job['id']}: {duration_s:.1f}s audio in {synth_s:.1f}s")
+            except Exception as e:
+                record = {"id": job["id"], "voice": voice, "error": f"{type(e).__name__}: {e}"}
+                print(f"[worker {worker}] {n}/{len(jobs)} {job['id']} failed: {record['error']}")
+            # One complete line per job, flushed to disk: this is the checkpoint
+            progress.write(json.dumps(record, ensure_ascii=False) + "\n")
+            progress.flush()
+            os.fsync(progress.fileno())
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Resumable, sharded bulk synthesis with VieNeu-TTS")
+    parser.add_argument("--input", required=True, help="JSONL file with one {id, text, voice} job per line.")
+    parser.add_argument("--output-dir", required=True, help="Where to write audio/, progress/ and manifest.jsonl.")
+    parser.add_argument("--voices-dir", default="./sample", help="Directory with <voice>.wav/.txt (and .npy).")
+    parser.add_argument("--default-voice", default="Vĩnh (nam miền Nam)", help="Voice for jobs without one.")
+    parser.add_argument("--shard", type=parse_shard, default=(0, 1), help="Process shard i of N (e.g. 0/4).")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes on this machine.")
+    parser.add_argument(
+        "--threads", type=int, default=None, help="Torch threads per worker (default: cores / workers)."
+    )
+    parser.add_argument("--max-chars", type=int, default=256, help="Maximum characters per synthesized chunk.")
+    parser.add_argument("--backbone", default="pnnbao-ump/VieNeu-TTS")
+    parser.add_argument("--codec", default="neuphonic/neucodec")
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.threads is None and args.workers > 1:
+        args.threads = max(1, (os.cpu_count() or 1) // args.workers)
+    return args
+
+
+def main():
+    args = parse_args()
+    output_dir = Path(args.output_dir)
+    (output_dir / "audio").mkdir(parents=True, exist_ok=True)
+    (output_dir / "progress").mkdir(exist_ok=True)
+
+    shard_index, shard_count = args.shard
+    jobs = [job for job in read_jobs(args.input) if in_shard(job["id"], shard_index, shard_count)]
+    done = completed_ids(output_dir)
+    todo = [job for job in jobs if job["id"] not in done]
+    print(f"📋 Shard {shard_index}/{shard_count}: {len(jobs)} jobs, {len(jobs) - len(todo)} already done")
+
+    if todo:
+        workers = min(args.workers, len(todo))
+        if workers == 1:
+            run_worker(0, todo, args)
+        else:
+            # spawn: each worker loads its own model, torch state is not shared with the parent
+            ctx = mp.get_context("spawn")
+            processes = [
+                ctx.Process(target=run_worker, args=(worker, todo[worker::workers], args))
+                for worker in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+    n_records = write_manifest(output_dir)
+    remaining = len([job for job in jobs if job["id"] not in completed_ids(output_dir)])
+    print(f"✅ {n_records} clips in {output_dir / 'manifest.jsonl'}; {remaining} jobs of this shard remaining")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Precompute reference codes for voices, so servers can run the codec decoder only.
+
+Every `<voice>.wav` in the input directory is encoded to `<voice>.npy` in the output
+directory (next to the audio by default). Load them with `vieneu_tts.load_ref_codes`
+and pass them to a `VieNeuTTS(..., decoder_only=True)` instance.
+
+    python -m tools.encode_voices --input-dir ./sample
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from neucodec import NeuCodec, DistillNeuCodec  # noqa: E402
+
+from vieneu_tts import save_ref_codes  # noqa: E402
+from vieneu_tts.vieneu_tts import encode_reference_audio  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Encode reference voices to precomputed codes")
+    parser.add_argument("--input-dir", default="./sample", help="Directory with reference .wav files.")
+    parser.add_argument("--output-dir", default=None, help="Where to write <voice>.npy (default: input dir).")
+    parser.add_argument(
+        "--codec",
+        choices=["neuphonic/neucodec", "neuphonic/distill-neucodec"],
+        default="neuphonic/neucodec",
+        help="Codec used to encode; must match the codec family used for decoding.",
+    )
+    parser.add_argument("--device", default="cpu", help="Device for the codec encoder.")
+    parser.add_argument("--overwrite", action="store_true", help="Re-encode voices that already have codes.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    input_dir = Path(args.input_dir)
+    output_dir = Path(args.output_dir) if args.output_dir else input_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    wav_paths = sorted(input_dir.glob("*.wav"))
+    if not wav_paths:
+        raise FileNotFoundError(f"No .wav files found in {input_dir}")
+
+    codec_cls = DistillNeuCodec if args.codec == "neuphonic/distill-neucodec" else NeuCodec
+    print(f"Loading codec from: {args.codec} on {args.device} ...")
+    codec = codec_cls.from_pretrained(args.codec).eval().to(args.device)
+
+    for wav_path in wav_paths:
+        codes_path = output_dir / f"{wav_path.stem}.npy"
+        if codes_path.exists() and not args.overwrite:
+            print(f"↷ Skipping {wav_path.name} (codes exist)")
+            continue
+        ref_codes = encode_reference_audio(codec, wav_path)
+        save_ref_codes(codes_path, ref_codes)
+        print(f"✓ {wav_path.name} -> {codes_path} ({len(ref_codes)} frames)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Export the VieNeu-TTS Qwen backbone to ONNX with past-key-value inputs/outputs.
+
+The output directory contains `model.onnx` plus the tokenizer files, and can be passed
+directly as `backbone_repo` (any path containing "onnx" selects the onnxruntime backend):
+
+    python -m tools.export_backbone_onnx --output ./VieNeu-TTS-onnx
+    tts = VieNeuTTS(backbone_repo="./VieNeu-TTS-onnx", codec_repo="neuphonic/neucodec-onnx-decoder")
+"""
+
+import argparse
+import shutil
+from pathlib import Path
+
+
+def export_backbone(backbone_repo: str, output_dir: str, opset: int | None = None) -> Path:
+    try:
+        from optimum.exporters.onnx import main_export
+    except ImportError as e:
+        raise ImportError(
+            "Failed to import `optimum`. "
+            "Please install it with:\n"
+            "    pip install optimum[onnx]"
+        ) from e
+
+    output_path = Path(output_dir)
+    print(f"Exporting {backbone_repo} to {output_path} ...")
+    main_export(
+        backbone_repo,
+        output=output_path,
+        task="text-generation-with-past",
+        opset=opset,
+        device="cpu",
+        no_post_process=False,
+    )
+    # The runtime only needs the merged decoder with past
+    for extra in ("decoder_model.onnx", "decoder_model.onnx_data"):
+        if (output_path / extra).exists() and (output_path / "model.onnx").exists():
+            (output_path / extra).unlink()
+    return output_path / "model.onnx"
+
+
+def quantize_int8(model_path: Path) -> Path:
+    """Dynamic int8 quantization of the exported graph's MatMul weights (CPU)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    fp32_path = model_path.with_name("model_fp32.onnx")
+    shutil.move(model_path, fp32_path)
+    print(f"Quantizing {fp32_path.name} to int8 ...")
+    quantize_dynamic(
+        str(fp32_path),
+        str(model_path),
+        weight_type=QuantType.QInt8,
+        use_external_data_format=True,
+    )
+    fp32_path.unlink()
+    data_path = fp32_path.with_name(fp32_path.name + "_data")
+    if data_path.exists():
+        data_path.unlink()
+    return model_path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export the VieNeu-TTS backbone to ONNX")
+    parser.add_argument(
+        "--backbone",
+        default="pnnbao-ump/VieNeu-TTS",
+        help="Backbone repository ID or local path.",
+    )
+    parser.add_argument(
+        "--output",
+        default="./VieNeu-TTS-onnx",
+        help="Output directory (keep 'onnx' in the name so VieNeuTTS picks the onnx backend).",
+    )
+    parser.add_argument(
+        "--opset",
+        type=int,
+        default=None,
+        help="ONNX opset version (default: optimum's recommended opset).",
+    )
+    parser.add_argument(
+        "--int8",
+        action="store_true",
+        help="Apply onnxruntime dynamic int8 quantization after export.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    model_path = export_backbone(args.backbone, args.output, opset=args.opset)
+    if args.int8:
+        quantize_int8(model_path)
+    print(f"✅ Saved ONNX backbone to: {model_path}")
+
+
+if __name__ == "__main__":
+    main()
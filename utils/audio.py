@@ -0,0 +1,71 @@
+import io
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from utils.resample import resample
+
+AudioSource = str | Path | bytes | bytearray | memoryview | np.ndarray | tuple
+
+
+def _to_float32(wav: np.ndarray) -> np.ndarray:
+    """Convert integer PCM to float32 in [-1, 1]; float input is only cast."""
+    if np.issubdtype(wav.dtype, np.floating):
+        return wav.astype(np.float32, copy=False)
+    if wav.dtype == np.uint8:
+        return (wav.astype(np.float32) - 128.0) / 128.0
+    if np.issubdtype(wav.dtype, np.integer):
+        return wav.astype(np.float32) / float(np.iinfo(wav.dtype).max + 1)
+    raise TypeError(f"Unsupported audio dtype: {wav.dtype}")
+
+
+def _to_mono(wav: np.ndarray) -> np.ndarray:
+    if wav.ndim == 1:
+        return wav
+    if wav.ndim != 2:
+        raise ValueError(f"Expected 1-D or 2-D audio, got shape {wav.shape}")
+    # Channels are the short axis: [samples, channels] (soundfile, gradio) or [channels, samples]
+    channel_axis = 1 if wav.shape[1] <= wav.shape[0] else 0
+    return wav.mean(axis=channel_axis)
+
+
+def _read(source) -> tuple[np.ndarray, int]:
+    try:
+        wav, sample_rate = sf.read(source, dtype="float32", always_2d=False)
+    except (sf.LibsndfileError, RuntimeError):
+        # Containers libsndfile can't decode (e.g. m4a) still go through librosa
+        if not isinstance(source, (str, Path)):
+            raise
+        import librosa
+
+        wav, sample_rate = librosa.load(source, sr=None, mono=True)
+    return wav, sample_rate
+
+
+def load_audio(source: AudioSource, sample_rate: int | None = None, target_sr: int = 16000) -> np.ndarray:
+    """
+    Load audio from a path, encoded bytes or a numpy array, as mono float32 at `target_sr`.
+
+    Args:
+        source: File path, encoded audio bytes (wav/flac/ogg/...), a numpy waveform,
+            or a `(sample_rate, waveform)` tuple as produced by `gr.Audio(type="numpy")`.
+        sample_rate: Sample rate of a numpy `source` (ignored for files and bytes).
+        target_sr: Output sample rate.
+    Returns:
+        np.ndarray: Mono float32 waveform at `target_sr`.
+    """
+    if isinstance(source, tuple):
+        sample_rate, source = source
+
+    if isinstance(source, np.ndarray):
+        if sample_rate is None:
+            raise ValueError("`sample_rate` is required when passing a numpy waveform.")
+        wav = source
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        wav, sample_rate = _read(io.BytesIO(source))
+    else:
+        wav, sample_rate = _read(source)
+
+    wav = _to_mono(_to_float32(np.asarray(wav)))
+    return resample(wav, int(sample_rate), target_sr)
@@ -0,0 +1,148 @@
+import io
+import struct
+from functools import lru_cache
+
+import numpy as np
+import soundfile as sf
+
+from utils.resample import StreamingResampler, resample
+
+# Segment end points of the G.711 companding curves (Sun g711.c)
+_ULAW_SEG_END = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+_ALAW_SEG_END = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF])
+
+STREAM_FORMATS = ("pcm16", "wav", "mulaw", "alaw")
+
+
+def to_pcm16(wav: np.ndarray) -> np.ndarray:
+    """Convert a float waveform in [-1, 1] to int16 samples (clipped, rounded)."""
+    wav = np.asarray(wav, dtype=np.float32)
+    return np.clip(np.rint(wav * 32767.0), -32768, 32767).astype(np.int16)
+
+
+@lru_cache(maxsize=2)
+def _g711_table(law: str) -> np.ndarray:
+    """Lookup table mapping every int16 value (viewed as uint16) to its G.711 byte."""
+    pcm = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)
+    if law == "mulaw":
+        val = pcm >> 2
+        mask = np.where(val < 0, 0x7F, 0xFF)
+        val = np.minimum(np.abs(val), 8159) + (0x84 >> 2)
+        seg = np.searchsorted(_ULAW_SEG_END, val, side="left")
+        code = (np.minimum(seg, 7) << 4) | ((val >> (np.minimum(seg, 7) + 1)) & 0x0F)
+        code = np.where(seg >= 8, 0x7F, code)
+    else:
+        val = pcm >> 3
+        mask = np.where(val >= 0, 0xD5, 0x55)
+        val = np.where(val >= 0, val, -val - 1)
+        seg = np.searchsorted(_ALAW_SEG_END, val, side="left")
+        shift = np.where(seg < 2, 1, np.minimum(seg, 7))
+        code = (np.minimum(seg, 7) << 4) | ((val >> shift) & 0x0F)
+        code = np.where(seg >= 8, 0x7F, code)
+    return (code ^ mask).astype(np.uint8)
+
+
+def g711_encode(wav: np.ndarray, law: str = "mulaw") -> bytes:
+    """Encode a float waveform to G.711 µ-law (`"mulaw"`) or A-law (`"alaw"`) bytes."""
+    if law not in ("mulaw", "alaw"):
+        raise ValueError(f"Unsupported G.711 law: {law}. Expected 'mulaw' or 'alaw'.")
+    return _g711_table(law)[to_pcm16(wav).view(np.uint16)].tobytes()
+
+
+def encode_audio(wav: np.ndarray, sample_rate: int = 24000, fmt: str = "wav", target_sr: int | None = None) -> bytes:
+    """
+    Encode a float32 waveform to an in-memory audio payload.
+
+    Args:
+        wav (np.ndarray): Mono float waveform in [-1, 1].
+        sample_rate (int): Sample rate of `wav`.
+        fmt (str): `"pcm16"` (raw little-endian int16), `"wav"` (16-bit PCM), `"flac"`,
+            `"mulaw"` or `"alaw"` (raw G.711, 8 kHz by default).
+        target_sr (int): Output sample rate. Defaults to `sample_rate`, or 8000 for G.711.
+    Returns:
+        bytes: Encoded audio.
+    """
+    if target_sr is None:
+        target_sr = 8000 if fmt in ("mulaw", "alaw") else sample_rate
+    wav = resample(wav, sample_rate, target_sr)
+
+    match fmt:
+        case "pcm16":
+            return to_pcm16(wav).tobytes()
+        case "mulaw" | "alaw":
+            return g711_encode(wav, law=fmt)
+        case "wav" | "flac":
+            buffer = io.BytesIO()
+            sf.write(buffer, to_pcm16(wav), target_sr, format=fmt.upper(), subtype="PCM_16")
+            return buffer.getvalue()
+        case _:
+            raise ValueError(f"Unsupported output format: {fmt}")
+
+
+def wav_header(sample_rate: int, n_samples: int | None = None) -> bytes:
+    """16-bit mono PCM WAV header. Without `n_samples` the sizes are left open for streaming."""
+    data_size = 0xFFFFFFFF - 36 if n_samples is None else 2 * n_samples
+    return (
+        b"RIFF" + struct.pack("<I", min(data_size + 36, 0xFFFFFFFF)) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, 2 * sample_rate, 2, 16)
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+class StreamEncoder:
+    """
+    Encode a stream of float32 chunks (e.g. from `VieNeuTTS.infer_stream`) to bytes chunk by chunk.
+
+    `fmt` is one of `STREAM_FORMATS`; `"wav"` emits a streaming header before the first chunk.
+    Resampling (e.g. 24 kHz -> 8 kHz µ-law for telephony) keeps filter state across chunks,
+    so the concatenated output equals encoding the whole waveform at once.
+    """
+
+    def __init__(self, fmt: str = "pcm16", sample_rate: int = 24000, target_sr: int | None = None):
+        if fmt not in STREAM_FORMATS:
+            raise ValueError(f"Unsupported stream format: {fmt}. Expected one of {STREAM_FORMATS}.")
+        if target_sr is None:
+            target_sr = 8000 if fmt in ("mulaw", "alaw") else sample_rate
+        self.fmt = fmt
+        self.sample_rate = target_sr
+        self._resampler = StreamingResampler(sample_rate, target_sr)
+        self._header_sent = False
+
+    def _encode(self, wav: np.ndarray) -> bytes:
+        payload = g711_encode(wav, law=self.fmt) if self.fmt in ("mulaw", "alaw") else to_pcm16(wav).tobytes()
+        if self.fmt == "wav" and not self._header_sent:
+            self._header_sent = True
+            payload = wav_header(self.sample_rate) + payload
+        return payload
+
+    def encode(self, chunk: np.ndarray) -> bytes:
+        return self._encode(self._resampler.process(chunk))
+
+    def flush(self) -> bytes:
+        return self._encode(self._resampler.flush())
+
+
+def crossfade_concat(segments: list[np.ndarray], sample_rate: int = 24000, crossfade_ms: float = 10.0) -> np.ndarray:
+    """
+    Join waveforms end to end, overlapping each boundary by `crossfade_ms` with an equal-power fade.
+
+    Segments shorter than the crossfade are joined with a correspondingly shorter one.
+    """
+    segments = [np.asarray(seg, dtype=np.float32) for seg in segments if len(seg)]
+    if not segments:
+        return np.zeros(0, dtype=np.float32)
+    fade_len = int(sample_rate * crossfade_ms / 1000)
+    out = segments[0]
+    pieces = []
+    for seg in segments[1:]:
+        n = min(fade_len, len(out), len(seg))
+        if n == 0:
+            pieces.append(out)
+            out = seg
+            continue
+        t = (np.arange(n, dtype=np.float32) + 0.5) / n
+        overlap = out[-n:] * np.cos(0.5 * np.pi * t) + seg[:n] * np.sin(0.5 * np.pi * t)
+        pieces.append(out[:-n])
+        out = np.concatenate([overlap, seg[n:]])
+    pieces.append(out)
+    return np.concatenate(pieces)
@@ -117,9 +117,10 @@ def phonemize_text(text: str) -> str:
         language_switch="remove-flags"
     )
 
-def phonemize_with_dict(text: str, phoneme_dict=phoneme_dict) -> str:
-    """Phonemize text with dictionary lookup."""
-    text = normalizer.normalize(text)
+def phonemize_with_dict(text: str, phoneme_dict=phoneme_dict, normalize: bool = True) -> str:
+    """Phonemize text with dictionary lookup (pass normalize=False for already normalized text)."""
+    if normalize:
+        text = normalizer.normalize(text)
     words = text.split()
     result = []
     
@@ -0,0 +1,161 @@
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+# Filter design: Kaiser-windowed sinc with `_ZERO_CROSSINGS` zero crossings per side
+# (at the lower of the two rates) and the cutoff just below the lower Nyquist frequency.
+_ZERO_CROSSINGS = 16
+_KAISER_BETA = 8.6
+_ROLLOFF = 0.945
+
+# Output samples computed per vectorized block; keeps the gathered window matrix cache-sized
+_BLOCK_SIZE = 2048
+
+
+@lru_cache(maxsize=32)
+def _polyphase_filter(up: int, down: int) -> np.ndarray:
+    """
+    Polyphase decomposition of the anti-aliasing filter for an `up/down` rate change.
+
+    Returns an array of shape [up, taps] where row `r` holds the taps of phase `r`,
+    already reversed so it can be applied as a dot product with an input window.
+    """
+    factor = max(up, down)
+    half_length = _ZERO_CROSSINGS * factor
+    cutoff = _ROLLOFF * 0.5 / factor  # cycles per sample at the upsampled rate
+
+    n = np.arange(-half_length, half_length + 1, dtype=np.float64)
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(len(n), _KAISER_BETA) * up
+
+    n_phase_taps = -(-len(taps) // up)
+    taps = np.pad(taps, (0, n_phase_taps * up - len(taps)))
+    bank = taps.reshape(n_phase_taps, up).T  # bank[r, k] = taps[r + up * k]
+    return np.ascontiguousarray(bank[:, ::-1], dtype=np.float32)
+
+
+def _rate_ratio(src_sr: int, dst_sr: int) -> tuple[int, int]:
+    g = gcd(int(src_sr), int(dst_sr))
+    return int(dst_sr) // g, int(src_sr) // g
+
+
+def _filter_range(
+    buffer: np.ndarray, buffer_start: int, first: int, last: int, up: int, down: int, bank: np.ndarray
+) -> np.ndarray:
+    """
+    Compute output samples `first..last-1`, where `buffer[i]` holds input sample `buffer_start + i`.
+
+    Output sample n reads input samples base(n) - k, k = 0..n_taps - 1, through filter phase r(n),
+    with base(n), r(n) = divmod(n * down + delay, up).
+    """
+    n_taps = bank.shape[1]
+    if last <= first or len(buffer) < n_taps:
+        # Nothing complete yet (e.g. an empty or very short chunk while downsampling)
+        return np.zeros(0, dtype=np.float32)
+    delay = _ZERO_CROSSINGS * max(up, down)
+    windows = np.lib.stride_tricks.sliding_window_view(buffer, n_taps)
+
+    out = np.empty(max(last - first, 0), dtype=np.float32)
+    for start in range(first, last, _BLOCK_SIZE):
+        positions = np.arange(start, min(start + _BLOCK_SIZE, last), dtype=np.int64) * down + delay
+        base, phase = np.divmod(positions, up)
+        rows = base - (n_taps - 1) - buffer_start
+        out[start - first : start - first + len(positions)] = np.einsum("ij,ij->i", windows[rows], bank[phase])
+    return out
+
+
+def resample(wav: np.ndarray, src_sr: int, dst_sr: int) -> np.ndarray:
+    """
+    Resample a mono float waveform from `src_sr` to `dst_sr` with a cached polyphase filter.
+
+    The output has `ceil(len(wav) * dst_sr / src_sr)` samples and is aligned with the input
+    (no group delay).
+    """
+    wav = np.asarray(wav, dtype=np.float32)
+    if src_sr == dst_sr:
+        return wav.copy()
+
+    up, down = _rate_ratio(src_sr, dst_sr)
+    bank = _polyphase_filter(up, down)
+    n_taps = bank.shape[1]
+    delay = _ZERO_CROSSINGS * max(up, down)
+
+    n_out = -(-len(wav) * up // down)
+    if n_out == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    last_base = ((n_out - 1) * down + delay) // up
+    padded = np.concatenate([
+        np.zeros(n_taps - 1, dtype=np.float32),
+        wav,
+        np.zeros(max(0, last_base + 1 - len(wav)), dtype=np.float32),
+    ])
+    return _filter_range(padded, -(n_taps - 1), 0, n_out, up, down, bank)
+
+
+class StreamingResampler:
+    """
+    Chunk-wise version of `resample`: feeding chunks to `process` and then calling `flush`
+    yields exactly the same samples as resampling the concatenated signal in one go.
+
+    Each chunk's output is delayed only by the filter's look-ahead
+    (`_ZERO_CROSSINGS` samples at the lower rate).
+    """
+
+    def __init__(self, src_sr: int, dst_sr: int):
+        self.src_sr = int(src_sr)
+        self.dst_sr = int(dst_sr)
+        self.up, self.down = _rate_ratio(src_sr, dst_sr)
+        self._bank = _polyphase_filter(self.up, self.down)
+        self._delay = _ZERO_CROSSINGS * max(self.up, self.down)
+        self.reset()
+
+    def reset(self):
+        n_taps = self._bank.shape[1]
+        self._buffer = np.zeros(n_taps - 1, dtype=np.float32)
+        self._buffer_start = -(n_taps - 1)
+        self._n_in = 0
+        self._n_out = 0
+
+    def _emit(self, last: int) -> np.ndarray:
+        out = _filter_range(
+            self._buffer, self._buffer_start, self._n_out, last, self.up, self.down, self._bank
+        )
+        self._n_out = max(self._n_out, last)
+
+        # Drop input that no future output sample can reach
+        n_taps = self._bank.shape[1]
+        next_base = (self._n_out * self.down + self._delay) // self.up
+        keep_from = next_base - (n_taps - 1) - self._buffer_start
+        if keep_from > 0:
+            self._buffer = self._buffer[keep_from:]
+            self._buffer_start += keep_from
+        return out
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Feed the next input chunk, return all output samples that are now complete."""
+        chunk = np.asarray(chunk, dtype=np.float32)
+        if self.up == self.down:
+            return chunk.copy()
+        self._buffer = np.concatenate([self._buffer, chunk])
+        self._n_in += len(chunk)
+        if self._n_in == 0:
+            return np.zeros(0, dtype=np.float32)
+        # Output n is complete once input sample base(n) has arrived
+        last = ((self._n_in - 1) * self.up - self._delay) // self.down + 1
+        return self._emit(max(last, self._n_out))
+
+    def flush(self) -> np.ndarray:
+        """Zero-pad the end of the signal and return the remaining output samples."""
+        if self.up == self.down:
+            return np.zeros(0, dtype=np.float32)
+        n_out = -(-self._n_in * self.up // self.down)
+        if n_out <= self._n_out:
+            return np.zeros(0, dtype=np.float32)
+        last_base = ((n_out - 1) * self.down + self._delay) // self.up
+        n_missing = last_base + 1 - (self._buffer_start + len(self._buffer))
+        if n_missing > 0:
+            self._buffer = np.concatenate([self._buffer, np.zeros(n_missing, dtype=np.float32)])
+        out = self._emit(n_out)
+        self.reset()
+        return out
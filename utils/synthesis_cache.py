@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from utils.normalize_text import VietnameseTTSNormalizer
+
+_MANIFEST_VERSION = 1
+
+
+def _sha1(*parts) -> str:
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def voice_id(ref, ref_text: str) -> str:
+    """
+    Stable id of a cloned voice: hash of its reference (an audio file path, whose bytes are
+    hashed, or its reference codes) and transcript.
+    """
+    if isinstance(ref, (str, os.PathLike)):
+        with open(ref, "rb") as f:
+            ref_bytes = f.read()
+    else:
+        ref_bytes = np.asarray(ref.cpu() if hasattr(ref, "cpu") else ref, dtype=np.int64).tobytes()
+    return _sha1(ref_bytes, " ".join(ref_text.split()))
+
+
+class SynthesisManifest:
+    """
+    On-disk cache of synthesized chunks, used to re-render edited documents incrementally.
+
+    `manifest.json` in `cache_dir` maps a chunk key — the hash of its normalized text, the voice,
+    the model and the synthesis params — to a `.npy` file with the chunk's 24 kHz audio. Unchanged
+    chunks are read back; only new or edited ones need to be synthesized.
+    """
+
+    def __init__(self, cache_dir: str, model: dict, params: dict | None = None):
+        self.cache_dir = cache_dir
+        self._fingerprint = json.dumps({"model": model, "params": params or {}}, sort_keys=True)
+        self._normalizer = VietnameseTTSNormalizer()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries: dict[str, dict] = self._load()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.cache_dir, "manifest.json")
+
+    def _load(self) -> dict[str, dict]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable synthesis manifest {self.manifest_path}: {e}")
+            return {}
+        if manifest.get("version") != _MANIFEST_VERSION:
+            return {}
+        return manifest.get("entries", {})
+
+    def _audio_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def key(self, text: str, voice: str) -> str:
+        """Cache key of `text` spoken by `voice` (see `voice_id`) with this manifest's model and params."""
+        normalized = " ".join(self._normalizer.normalize(text).split())
+        return _sha1(normalized, voice, self._fingerprint)
+
+    def get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is not None and os.path.exists(self._audio_path(key)):
+            try:
+                wav = np.load(self._audio_path(key))
+                self.hits += 1
+                return wav
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable cached chunk {key}: {e}")
+        self.misses += 1
+        return None
+
+    def put(self, key: str, text: str, wav: np.ndarray):
+        """Store a chunk's audio (the manifest itself is written by `save`)."""
+        wav = np.asarray(wav, dtype=np.float32)
+        # Write to a temp file and os.replace, so an interrupted run never leaves a truncated chunk
+        tmp_path = f"{self._audio_path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, wav)
+        os.replace(tmp_path, self._audio_path(key))
+        with self._lock:
+            self.entries[key] = {"text": text, "samples": len(wav)}
+
+    def prune(self, keep: set[str]) -> int:
+        """Drop every chunk not in `keep`; returns the number removed."""
+        with self._lock:
+            stale = [key for key in self.entries if key not in keep]
+            for key in stale:
+                del self.entries[key]
+        for key in stale:
+            try:
+                os.remove(self._audio_path(key))
+            except FileNotFoundError:
+                pass
+        return len(stale)
+
+    def save(self):
+        with self._lock:
+            manifest = {"version": _MANIFEST_VERSION, "entries": dict(self.entries)}
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
@@ -0,0 +1,127 @@
+import re
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List
+
+
+def split_text_into_chunks(text: str, max_chars: int = 256, keep_paragraphs: bool = False) -> List[str]:
+    """
+    Split raw text into chunks no longer than max_chars.
+    Preference is given to sentence boundaries; otherwise falls back to word-based splitting.
+    With keep_paragraphs, chunks never span a blank line, so editing one paragraph leaves the
+    chunks of the others unchanged.
+    """
+    if keep_paragraphs:
+        return [
+            chunk
+            for paragraph in re.split(r"\n\s*\n", text.strip())
+            for chunk in split_text_into_chunks(paragraph, max_chars=max_chars)
+        ]
+
+    sentences = re.split(r"(?<=[\.\!\?\…])\s+", text.strip())
+    chunks: List[str] = []
+    buffer = ""
+
+    def flush_buffer():
+        nonlocal buffer
+        if buffer:
+            chunks.append(buffer.strip())
+            buffer = ""
+
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+
+        # If single sentence already fits, try to append to current buffer
+        if len(sentence) <= max_chars:
+            candidate = f"{buffer} {sentence}".strip() if buffer else sentence
+            if len(candidate) <= max_chars:
+                buffer = candidate
+            else:
+                flush_buffer()
+                buffer = sentence
+            continue
+
+        # Fallback: sentence too long, break by words
+        flush_buffer()
+        words = sentence.split()
+        current = ""
+        for word in words:
+            candidate = f"{current} {word}".strip() if current else word
+            if len(candidate) > max_chars and current:
+                chunks.append(current.strip())
+                current = word
+            else:
+                current = candidate
+        if current:
+            chunks.append(current.strip())
+
+    flush_buffer()
+    return [chunk for chunk in chunks if chunk]
+
+
+# Sentence end (optionally followed by closing quotes/brackets) or clause punctuation, then whitespace
+_SENTENCE_END_RE = re.compile(r"[\.\!\?\…]+[\"'”’\)\]]*\s+|\n\s*")
+_CLAUSE_END_RE = re.compile(r"[,;:–—][\"'”’\)\]]*\s+")
+
+
+class SentenceAccumulator:
+    """
+    Incremental segmenter for text that arrives in fragments (e.g. an LLM token stream).
+
+    `feed` returns the segments completed so far: at sentence ends and newlines, at clause
+    punctuation once the pending text reaches `clause_chars`, and at a word boundary before
+    `max_chars`. A boundary is only confirmed once the whitespace after it has arrived, so
+    "3.5" or "v.v" split across fragments is never cut. `flush` returns the remainder.
+    """
+
+    def __init__(self, max_chars: int = 256, clause_chars: int = 120):
+        self.max_chars = max_chars
+        self.clause_chars = min(clause_chars, max_chars // 2)
+        self._buffer = ""
+
+    def feed(self, fragment: str) -> List[str]:
+        self._buffer += fragment
+        segments = []
+        while True:
+            end = self._next_boundary()
+            if end is None:
+                break
+            segment, self._buffer = self._buffer[:end].strip(), self._buffer[end:]
+            if segment:
+                segments.append(segment)
+        return segments
+
+    def flush(self) -> List[str]:
+        rest, self._buffer = self._buffer.strip(), ""
+        return split_text_into_chunks(rest, max_chars=self.max_chars) if rest else []
+
+    def _next_boundary(self) -> int | None:
+        match = _SENTENCE_END_RE.search(self._buffer)
+        if match and match.end() <= self.max_chars:
+            return match.end()
+        if len(self._buffer) >= self.clause_chars:
+            for match in _CLAUSE_END_RE.finditer(self._buffer, 0, self.max_chars):
+                if match.end() >= self.clause_chars:
+                    return match.end()
+        if len(self._buffer) > self.max_chars:
+            cut = self._buffer.rfind(" ", 0, self.max_chars)
+            return cut + 1 if cut > 0 else self.max_chars
+        return None
+
+
+def iter_text_segments(fragments: Iterable[str], max_chars: int = 256) -> Iterator[str]:
+    """Yield synthesis segments from a stream of text fragments as soon as each one is complete."""
+    accumulator = SentenceAccumulator(max_chars=max_chars)
+    for fragment in fragments:
+        yield from accumulator.feed(fragment)
+    yield from accumulator.flush()
+
+
+async def aiter_text_segments(fragments: AsyncIterable[str], max_chars: int = 256) -> AsyncIterator[str]:
+    """Async counterpart of `iter_text_segments`."""
+    accumulator = SentenceAccumulator(max_chars=max_chars)
+    async for fragment in fragments:
+        for segment in accumulator.feed(fragment):
+            yield segment
+    for segment in accumulator.flush():
+        yield segment
@@ -1,4 +1,17 @@
-from .vieneu_tts import VieNeuTTS
-
-__all__ = ["VieNeuTTS"]
+from .cancellation import CancellationToken, GenerationCancelled
+from .metrics import MetricsHook, MetricsRecorder
+from .scheduler import DeadlineExceeded, Priority, Scheduler
+from .vieneu_tts import VieNeuTTS, load_ref_codes, save_ref_codes
 
+__all__ = [
+    "VieNeuTTS",
+    "load_ref_codes",
+    "save_ref_codes",
+    "MetricsHook",
+    "MetricsRecorder",
+    "Scheduler",
+    "Priority",
+    "DeadlineExceeded",
+    "CancellationToken",
+    "GenerationCancelled",
+]
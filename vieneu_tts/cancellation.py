@@ -0,0 +1,29 @@
+import threading
+
+
+class GenerationCancelled(Exception):
+    """Raised by a synthesis call whose `CancellationToken` was cancelled."""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation for a synthesis call, e.g. when a streaming client disconnects.
+
+    Pass it as `cancel=` to `VieNeuTTS.infer`, `infer_stream`, `infer_batch`, `infer_text_stream`
+    or `Scheduler.submit`, and call `cancel()` from any thread. Generation checks it after every
+    token (and long-text APIs between chunks) and raises `GenerationCancelled`.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise GenerationCancelled("Synthesis was cancelled.")
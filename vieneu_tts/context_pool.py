@@ -0,0 +1,46 @@
+import queue
+from contextlib import contextmanager
+from typing import Any
+
+
+class ContextPool:
+    """
+    Fixed set of llama.cpp contexts (`llama_cpp.Llama` objects) handed out to one request at a time.
+
+    A `Llama` object is not thread-safe, so each request checks one out for the duration of its
+    generation. When every context is busy, `checkout` blocks until one is returned, or raises
+    `TimeoutError` after `timeout` seconds.
+    """
+
+    def __init__(self, contexts: list[Any], timeout: float | None = None):
+        if not contexts:
+            raise ValueError("ContextPool needs at least one context.")
+        self.contexts = list(contexts)
+        self.timeout = timeout
+        self._idle: queue.Queue = queue.Queue()
+        for context in self.contexts:
+            self._idle.put(context)
+
+    @property
+    def size(self) -> int:
+        return len(self.contexts)
+
+    @property
+    def available(self) -> int:
+        """Number of idle contexts (approximate under concurrency)."""
+        return self._idle.qsize()
+
+    @contextmanager
+    def checkout(self, timeout: float | None = None):
+        """Borrow an idle context, waiting up to `timeout` (default: the pool's) seconds for one."""
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            context = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"All {self.size} llama.cpp contexts are busy (waited {timeout:.1f}s)."
+            ) from None
+        try:
+            yield context
+        finally:
+            self._idle.put(context)
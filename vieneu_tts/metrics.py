@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Histogram buckets, picked by metric name suffix
+_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_TOKENS_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _buckets_for(name: str) -> tuple | None:
+    if name.endswith("_seconds"):
+        return _SECONDS_BUCKETS
+    if name.endswith("_tokens"):
+        return _TOKENS_BUCKETS
+    return None
+
+
+class MetricsHook:
+    """
+    Instrumentation interface for `VieNeuTTS(metrics=...)`. The base class records nothing.
+
+    `VieNeuTTS` reports these metrics (durations in seconds):
+        normalize_seconds, phonemize_seconds, prompt_tokens, prefill_seconds, decode_seconds,
+        decode_tokens, tokens_per_second, generate_seconds, codec_decode_seconds,
+        stream_chunk_seconds, time_to_first_audio_seconds, infer_seconds, audio_seconds,
+        coalesced_requests, queue_wait_seconds, rejected_requests (the last two from `Scheduler`)
+
+    Override `observe` to forward samples to another metrics system, and `span` to open
+    tracing spans (e.g. OpenTelemetry) around each stage.
+    """
+
+    def observe(self, name: str, value: float):
+        """Record one sample of metric `name`."""
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed stage and record it as `<name>_seconds` (not recorded if it raises)."""
+        start = time.perf_counter()
+        yield
+        self.observe(f"{name}_seconds", time.perf_counter() - start)
+
+
+class _Series:
+    def __init__(self, buckets: tuple | None, window: int):
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets) if buckets else None
+        self.recent = deque(maxlen=window)
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.recent.append(value)
+        if self.buckets:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.bucket_counts[i] += 1
+
+    def quantiles(self) -> dict[float, float]:
+        values = sorted(self.recent)
+        if not values:
+            return {}
+        return {q: values[min(int(q * len(values)), len(values) - 1)] for q in _QUANTILES}
+
+
+class MetricsRecorder(MetricsHook):
+    """
+    Thread-safe in-memory aggregation of the samples reported by `VieNeuTTS`.
+
+    Every metric keeps count/sum/min/max, quantiles over the last `window` samples and, for
+    `*_seconds` and `*_tokens` metrics, cumulative histogram buckets. Export with
+    `to_prometheus()` (Prometheus text exposition format) or `to_json()`.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._series: dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = _Series(_buckets_for(name), self.window)
+            series.add(float(value))
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> dict:
+        """Current aggregates as plain dicts, keyed by metric name."""
+        with self._lock:
+            out = {}
+            for name, series in sorted(self._series.items()):
+                out[name] = {
+                    "count": series.count,
+                    "sum": series.sum,
+                    "min": series.min,
+                    "max": series.max,
+                    "mean": series.sum / series.count,
+                    "quantiles": {str(q): v for q, v in series.quantiles().items()},
+                }
+                if series.buckets:
+                    out[name]["buckets"] = dict(zip(map(str, series.buckets), series.bucket_counts))
+            return out
+
+    def to_json(self, indent: int | None = None) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix: str = "vieneu_tts") -> str:
+        """Render all metrics in the Prometheus text format (histograms, or summaries without buckets)."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._series.items()):
+                metric = f"{prefix}_{name}" if prefix else name
+                if series.buckets:
+                    lines.append(f"# TYPE {metric} histogram")
+                    for bound, count in zip(series.buckets, series.bucket_counts):
+                        lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+                    lines.append(f'{metric}_bucket{{le="+Inf"}} {series.count}')
+                else:
+                    lines.append(f"# TYPE {metric} summary")
+                    for q, value in series.quantiles().items():
+                        lines.append(f'{metric}{{quantile="{q}"}} {value}')
+                lines.append(f"{metric}_sum {series.sum}")
+                lines.append(f"{metric}_count {series.count}")
+        return "\n".join(lines) + "\n"
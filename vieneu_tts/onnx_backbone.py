@@ -0,0 +1,126 @@
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+
+class OnnxBackbone:
+    """
+    Qwen backbone exported to ONNX (see `tools/export_backbone_onnx.py`) and run with onnxruntime.
+
+    The graph is expected to follow the optimum `text-generation-with-past` layout:
+    inputs `input_ids`, `attention_mask`, optional `position_ids` and `past_key_values.{i}.key/value`,
+    outputs `logits` and `present.{i}.key/value`. Generation and sampling are done in numpy,
+    so this class does not depend on torch (`VieNeuTTS` and the neucodec decoders still do).
+    """
+
+    def __init__(self, model_path: str | Path, num_threads: int | None = None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "Failed to import `onnxruntime`. "
+                "Please install it with:\n"
+                "    pip install onnxruntime"
+            ) from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.output_names = [o.name for o in self.session.get_outputs()]
+        self._past_inputs = [i for i in self.session.get_inputs() if i.name.startswith("past_key_values")]
+        if not self._past_inputs:
+            raise ValueError(
+                f"{model_path} has no past_key_values inputs. "
+                "Export the backbone with `tools/export_backbone_onnx.py` (text-generation-with-past)."
+            )
+        self._kv_dtype = np.float16 if self._past_inputs[0].type == "tensor(float16)" else np.float32
+        self._rng = np.random.default_rng()
+
+    @staticmethod
+    def find_model_file(model_dir: str | Path) -> Path:
+        model_dir = Path(model_dir)
+        if model_dir.is_file():
+            return model_dir
+        candidate = model_dir / "model.onnx"
+        if candidate.exists():
+            return candidate
+        matches = sorted(model_dir.glob("*.onnx"))
+        if not matches:
+            raise FileNotFoundError(f"No .onnx file found in {model_dir}")
+        return matches[0]
+
+    def _empty_past(self) -> dict[str, np.ndarray]:
+        past = {}
+        for inp in self._past_inputs:
+            # [batch, num_kv_heads, past_sequence_length, head_dim]
+            _, num_heads, _, head_dim = inp.shape
+            past[inp.name] = np.zeros((1, num_heads, 0, head_dim), dtype=self._kv_dtype)
+        return past
+
+    def _forward(self, input_ids: np.ndarray, past: dict[str, np.ndarray], past_length: int):
+        seq_len = input_ids.shape[-1]
+        feeds = {"input_ids": input_ids, **past}
+        if "attention_mask" in self.input_names:
+            feeds["attention_mask"] = np.ones((1, past_length + seq_len), dtype=np.int64)
+        if "position_ids" in self.input_names:
+            feeds["position_ids"] = np.arange(past_length, past_length + seq_len, dtype=np.int64)[None, :]
+
+        outputs = dict(zip(self.output_names, self.session.run(self.output_names, feeds)))
+        new_past = {
+            name.replace("present", "past_key_values"): value
+            for name, value in outputs.items()
+            if name.startswith("present")
+        }
+        return outputs["logits"][0, -1].astype(np.float32), new_past
+
+    def _sample_top_k(self, logits: np.ndarray, top_k: int, temperature: float) -> int:
+        top_idx = np.argpartition(-logits, top_k)[:top_k]
+        top_logits = logits[top_idx] / temperature
+        probs = np.exp(top_logits - top_logits.max())
+        probs /= probs.sum()
+        return int(top_idx[self._rng.choice(top_k, p=probs)])
+
+    def generate(
+        self,
+        prompt_ids: list[int],
+        max_length: int,
+        eos_token_id: int,
+        temperature: float = 1.0,
+        top_k: int = 50,
+        min_new_tokens: int = 0,
+        on_token: Callable[[], None] | None = None,
+    ) -> list[int]:
+        """
+        Sample until `eos_token_id` or `max_length` total tokens. Returns the new token ids (without EOS).
+
+        `on_token` is called after every sampled token (e.g. for latency metrics).
+        """
+        input_ids = np.asarray(prompt_ids, dtype=np.int64)[None, :]
+        logits, past = self._forward(input_ids, self._empty_past(), past_length=0)
+        past_length = input_ids.shape[-1]
+
+        output_ids: list[int] = []
+        while past_length < max_length:
+            if len(output_ids) < min_new_tokens:
+                logits[eos_token_id] = -np.inf
+            token_id = self._sample_top_k(logits, top_k, temperature)
+            if on_token is not None:
+                on_token()
+            if token_id == eos_token_id:
+                break
+            output_ids.append(token_id)
+            if past_length + 1 >= max_length:
+                break
+            logits, past = self._forward(
+                np.array([[token_id]], dtype=np.int64), past, past_length=past_length
+            )
+            past_length += 1
+
+        return output_ids
@@ -0,0 +1,245 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from concurrent.futures import Future
+from enum import IntEnum
+
+import numpy as np
+
+from utils.audio_output import crossfade_concat
+from utils.text_chunking import split_text_into_chunks
+
+from .cancellation import CancellationToken, GenerationCancelled
+from .metrics import MetricsHook
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request cannot finish (or did not start) before its deadline."""
+
+
+class _Job:
+    def __init__(
+        self,
+        chunks: list[str],
+        ref_codes,
+        ref_text: str,
+        priority: Priority,
+        deadline: float | None,
+        seq: int,
+        cancel: CancellationToken | None,
+    ):
+        self.chunks = chunks
+        self.ref_codes = ref_codes
+        self.ref_text = ref_text
+        self.priority = priority
+        self.deadline = deadline
+        self.seq = seq
+        self.cancel = cancel
+        self.next_chunk = 0
+        self.results: list[np.ndarray] = []
+        self.future: Future = Future()
+        self.submitted = time.monotonic()
+
+    @property
+    def key(self) -> tuple:
+        # Priority class first, then earliest deadline, then arrival order
+        return self.priority, self.deadline if self.deadline is not None else math.inf, self.seq
+
+    def remaining_chars(self) -> int:
+        return sum(len(chunk) for chunk in self.chunks[self.next_chunk :])
+
+
+class Scheduler:
+    """
+    Priority and deadline-aware front end for a shared `VieNeuTTS` instance.
+
+    Requests are split into chunks (`split_text_into_chunks`), and the worker threads always
+    synthesize the next chunk of the most urgent job: interactive before batch, then earliest
+    deadline, then arrival order. A long batch job goes back in the queue after every chunk,
+    so an interactive request waits for at most one chunk in progress. With
+    `reserved_interactive` workers it never waits for batch work at all.
+
+    `submit` with a deadline rejects the request up front (`DeadlineExceeded`) when the estimated
+    queue time plus its own synthesis time already overshoots the deadline. The estimate uses an
+    EWMA of measured seconds per character. Jobs that reach their deadline while queued fail
+    instead of running late.
+
+    Use `workers > 1` only with a backbone that serves concurrent requests, e.g. a GGUF backbone
+    with `backbone_contexts > 1`. `queue_wait_seconds` and `rejected_requests` go to `metrics`
+    (default: the hook of `tts`, `tts.metrics`).
+    """
+
+    def __init__(
+        self,
+        tts,
+        workers: int = 1,
+        reserved_interactive: int = 0,
+        max_chars: int = 256,
+        seconds_per_char: float = 0.05,
+        ewma_alpha: float = 0.2,
+        crossfade_ms: float = 10.0,
+        metrics: MetricsHook | None = None,
+    ):
+        if not 0 <= reserved_interactive < workers:
+            raise ValueError("`reserved_interactive` must leave at least one worker for batch work.")
+        self.tts = tts
+        self.workers = workers
+        self.reserved_interactive = reserved_interactive
+        self.max_chars = max_chars
+        self.seconds_per_char = seconds_per_char
+        self.ewma_alpha = ewma_alpha
+        self.crossfade_ms = crossfade_ms
+        self.metrics: MetricsHook | None = metrics if metrics is not None else tts.metrics
+
+        self._queue: list[tuple[tuple, _Job]] = []
+        self._running: dict[int, tuple[float, float]] = {}  # worker -> (start, estimated seconds)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._work, args=(i, i < reserved_interactive), daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(
+        self,
+        text: str,
+        ref_codes: np.ndarray,
+        ref_text: str,
+        priority: Priority = Priority.INTERACTIVE,
+        deadline_s: float | None = None,
+        cancel: CancellationToken | None = None,
+    ) -> Future:
+        """
+        Queue a synthesis request; the returned future resolves to its waveform.
+
+        Args:
+            text (str): Input text; long texts are synthesized chunk by chunk.
+            ref_codes (np.ndarray | torch.tensor): Encoded reference.
+            ref_text (str): Reference text for reference audio.
+            priority (Priority): `Priority.INTERACTIVE` or `Priority.BATCH`.
+            deadline_s (float): Seconds from now by which the audio must be ready.
+            cancel (CancellationToken): Fails the future with `GenerationCancelled` within one
+                token once cancelled, and drops the job's remaining chunks.
+        Raises:
+            DeadlineExceeded: The queue cannot meet `deadline_s`.
+        """
+        chunks = split_text_into_chunks(text, max_chars=self.max_chars)
+        if not chunks:
+            raise ValueError("Input text is empty.")
+        deadline = time.monotonic() + deadline_s if deadline_s is not None else None
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler is closed.")
+            job = _Job(chunks, ref_codes, ref_text, Priority(priority), deadline, next(self._seq), cancel)
+            if deadline is not None:
+                eta = self._estimate_seconds(job)
+                if time.monotonic() + eta > deadline:
+                    self._observe("rejected_requests", 1)
+                    raise DeadlineExceeded(f"Estimated completion in {eta:.2f}s exceeds the {deadline_s:.2f}s deadline.")
+            heapq.heappush(self._queue, (job.key, job))
+            self._cond.notify_all()
+        return job.future
+
+    def synthesize(self, *args, **kwargs) -> np.ndarray:
+        """Blocking `submit(...).result()`."""
+        return self.submit(*args, **kwargs).result()
+
+    def _estimate_seconds(self, job: _Job) -> float:
+        """Expected time until `job` finishes: work queued ahead of it and in progress, then its own."""
+        now = time.monotonic()
+        ahead = sum(queued.remaining_chars() for key, queued in self._queue if key < job.key)
+        running = sum(max(0.0, est - (now - start)) for start, est in self._running.values())
+        eligible = self.workers - (self.reserved_interactive if job.priority != Priority.INTERACTIVE else 0)
+        own = job.remaining_chars() * self.seconds_per_char
+        return (ahead * self.seconds_per_char + running) / eligible + own
+
+    def _observe(self, name: str, value: float):
+        if self.metrics is not None:
+            self.metrics.observe(name, value)
+
+    def _next_job(self, interactive_only: bool) -> _Job | None:
+        with self._cond:
+            while not self._closed and (
+                not self._queue or (interactive_only and self._queue[0][1].priority != Priority.INTERACTIVE)
+            ):
+                self._cond.wait()
+            if self._closed:
+                return None
+            return heapq.heappop(self._queue)[1]
+
+    def _work(self, worker: int, interactive_only: bool):
+        while (job := self._next_job(interactive_only)) is not None:
+            if job.next_chunk == 0:
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                self._observe("queue_wait_seconds", time.monotonic() - job.submitted)
+            if job.deadline is not None and time.monotonic() > job.deadline:
+                job.future.set_exception(DeadlineExceeded("Deadline passed before synthesis finished."))
+                continue
+            if job.cancel is not None and job.cancel.cancelled:
+                job.future.set_exception(GenerationCancelled("Synthesis was cancelled."))
+                continue
+
+            chunk = job.chunks[job.next_chunk]
+            start = time.monotonic()
+            with self._cond:
+                self._running[worker] = (start, len(chunk) * self.seconds_per_char)
+            try:
+                wav = self.tts.infer(chunk, job.ref_codes, job.ref_text, cancel=job.cancel)
+            except Exception as e:
+                job.future.set_exception(e)
+                continue
+            finally:
+                with self._cond:
+                    del self._running[worker]
+
+            with self._cond:
+                elapsed = time.monotonic() - start
+                self.seconds_per_char += self.ewma_alpha * (elapsed / max(len(chunk), 1) - self.seconds_per_char)
+                job.results.append(wav)
+                job.next_chunk += 1
+                finished = job.next_chunk == len(job.chunks)
+                if not finished and not self._closed:
+                    # Chunk boundary: requeue, so more urgent work goes first
+                    heapq.heappush(self._queue, (job.key, job))
+                    self._cond.notify_all()
+                    continue
+            if not finished:
+                # `close` was called while this chunk ran: nobody will pick the job up again
+                job.future.set_exception(RuntimeError("Scheduler closed before the request finished."))
+                continue
+            job.future.set_result(
+                job.results[0]
+                if len(job.results) == 1
+                else crossfade_concat(job.results, sample_rate=self.tts.sample_rate, crossfade_ms=self.crossfade_ms)
+            )
+
+    def close(self, wait: bool = True):
+        """Stop the workers after their current chunk; unfinished requests are cancelled or failed."""
+        with self._cond:
+            self._closed = True
+            pending, self._queue = self._queue, []
+            self._cond.notify_all()
+        for _, job in pending:
+            if not job.future.cancel():
+                job.future.set_exception(RuntimeError("Scheduler closed before the request finished."))
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
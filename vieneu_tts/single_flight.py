@@ -0,0 +1,172 @@
+import threading
+from typing import Any, Callable, Hashable, Iterator
+
+from .cancellation import CancellationToken
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: BaseException | None = None
+
+
+class _SharedStream:
+    """Chunks of one generator, buffered for every subscriber; produced on a background thread."""
+
+    def __init__(self):
+        self.chunks: list = []
+        self.error: BaseException | None = None
+        self.finished = False
+        self.stopping = False
+        self.subscribers = 0
+        self.cancel = CancellationToken()
+        self.cond = threading.Condition()
+
+    def produce(self, make_iterator: Callable[[CancellationToken], Iterator], on_done: Callable[[], None]):
+        iterator = None
+        try:
+            iterator = make_iterator(self.cancel)
+            for chunk in iterator:
+                with self.cond:
+                    if self.stopping:
+                        break
+                    self.chunks.append(chunk)
+                    self.cond.notify_all()
+        except BaseException as e:
+            self.error = e
+        finally:
+            if iterator is not None and hasattr(iterator, "close"):
+                iterator.close()
+            on_done()
+            with self.cond:
+                self.finished = True
+                self.cond.notify_all()
+
+    def unsubscribe(self):
+        with self.cond:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.finished:
+                # Everyone went away: stop generating
+                self.stopping = True
+                self.cancel.cancel()
+
+
+class _Subscription:
+    """
+    One consumer's iterator over a `_SharedStream`. It unsubscribes when exhausted, closed or
+    garbage-collected, also if it was never iterated.
+    """
+
+    def __init__(self, stream: _SharedStream):
+        self._stream = stream
+        self._index = 0
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        stream = self._stream
+        if self._closed:
+            raise StopIteration
+        try:
+            with stream.cond:
+                while self._index >= len(stream.chunks) and not stream.finished:
+                    stream.cond.wait()
+                if self._index < len(stream.chunks):
+                    chunk = stream.chunks[self._index]
+                elif stream.error is not None:
+                    raise stream.error
+                else:
+                    raise StopIteration
+        except BaseException:
+            self.close()
+            raise
+        self._index += 1
+        return chunk
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._stream.unsubscribe()
+
+    def __del__(self):
+        self.close()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: while a call for `key` is in flight, later callers with
+    the same key wait for it and get its result (or exception) instead of starting their own.
+
+    Nothing is kept once a call completes, so this complements caching rather than replacing it:
+    it only absorbs simultaneous duplicates. Results are shared by all callers and must be
+    treated as read-only.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self._streams: dict[Hashable, _SharedStream] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """Run `fn()` once for all concurrent callers of `key`; returns (value, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
+
+    def stream(
+        self, key: Hashable, make_iterator: Callable[[CancellationToken], Iterator]
+    ) -> tuple[Iterator[Any], bool]:
+        """
+        Share one iterator between concurrent consumers of `key`; returns (chunks, shared).
+
+        The iterator is consumed on a background thread; every consumer gets all of its chunks
+        from the start, whenever it joins. `make_iterator` receives a token that is cancelled
+        once every consumer has closed (or dropped) its chunks, and production stops.
+        """
+        with self._lock:
+            stream = self._streams.get(key)
+            shared = False
+            if stream is not None:
+                with stream.cond:
+                    if not stream.stopping and not stream.finished:
+                        stream.subscribers += 1
+                        shared = True
+            if shared:
+                self.coalesced += 1
+                return _Subscription(stream), True
+
+            stream = self._streams[key] = _SharedStream()
+            stream.subscribers = 1
+
+        def on_done():
+            with self._lock:
+                if self._streams.get(key) is stream:
+                    del self._streams[key]
+
+        threading.Thread(target=stream.produce, args=(make_iterator, on_done), daemon=True).start()
+        return _Subscription(stream), False
@@ -1,11 +1,27 @@
+import asyncio
+import copy
+import hashlib
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Generator
-import librosa
+from typing import AsyncGenerator, AsyncIterable, Generator, Iterable
 import numpy as np
 import torch
 from neucodec import NeuCodec, DistillNeuCodec
-from transformers import AutoTokenizer, AutoModelForCausalLM
-from utils.phonemize_text import phonemize_text, phonemize_with_dict
+from transformers import AutoTokenizer, AutoModelForCausalLM, DynamicCache
+from transformers.generation.stopping_criteria import StoppingCriteria, StoppingCriteriaList
+from transformers.generation.streamers import BaseStreamer
+from utils.audio import AudioSource, load_audio
+from utils.phonemize_text import normalizer, phonemize_text, phonemize_with_dict
+from utils.text_chunking import aiter_text_segments, iter_text_segments
+from .cancellation import CancellationToken
+from .context_pool import ContextPool
+from .metrics import MetricsHook
+from .prefix_cache import PrefixCache
+from .single_flight import SingleFlight
 import re
 
 def _linear_overlap_add(frames: list[np.ndarray], stride: int) -> np.ndarray:
@@ -34,6 +50,169 @@ def _linear_overlap_add(frames: list[np.ndarray], stride: int) -> np.ndarray:
     assert sum_weight.min() > 0
     return out / sum_weight
 
+_DTYPES = {
+    "float32": torch.float32,
+    "fp32": torch.float32,
+    "bfloat16": torch.bfloat16,
+    "bf16": torch.bfloat16,
+    "float16": torch.float16,
+    "fp16": torch.float16,
+}
+
+def _cpu_supports_bf16() -> bool:
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+def _resolve_dtype(dtype, device) -> torch.dtype:
+    """Map a dtype option (None, "auto", a name or a torch.dtype) to a torch.dtype for `device`."""
+    if dtype is None:
+        return torch.float32
+    if isinstance(dtype, torch.dtype):
+        return dtype
+    if dtype == "auto":
+        if str(device).startswith("cuda"):
+            return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        return torch.bfloat16 if _cpu_supports_bf16() else torch.float32
+    if dtype not in _DTYPES:
+        raise ValueError(f"Unsupported dtype: {dtype}. Expected one of {sorted(_DTYPES)} or 'auto'.")
+    return _DTYPES[dtype]
+
+def _module_nbytes(module: torch.nn.Module) -> int:
+    """Bytes held by a module's weights and buffers (tied and packed tensors counted once)."""
+    seen = set()
+    total = 0
+    tensors = []
+    for value in module.state_dict(keep_vars=True).values():
+        tensors.extend(value if isinstance(value, tuple) else [value])
+    for tensor in tensors:
+        if not isinstance(tensor, torch.Tensor):
+            continue
+        key = (tensor.data_ptr(), tensor.numel())
+        if key in seen:
+            continue
+        seen.add(key)
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+def _files_nbytes(*paths) -> int:
+    return sum(os.path.getsize(p) for p in paths if p and os.path.exists(p))
+
+# Prompt text before the phonemized reference text; identical for every request
+_PROMPT_HEADER = "user: Convert the text to speech:<|TEXT_PROMPT_START|>"
+
+# NeuCodec / DistillNeuCodec submodules only used by `encode_code`; `decode_code` needs
+# `generator` and `fc_post_a`
+_CODEC_ENCODER_MODULES = (
+    "semantic_model",
+    "SemanticEncoder_module",
+    "CodecEnc",
+    "codec_encoder",
+    "fc_prior",
+    "fc_sq_prior",
+)
+
+# Submodules only used by `decode_code`; `encode_code` still needs `generator.quantizer`
+_CODEC_DECODER_MODULES = ("fc_post_a", "generator.backbone", "generator.head")
+
+def _drop_submodules(module, names: tuple[str, ...]):
+    """Delete the (dotted) submodules `names` of `module` that exist."""
+    for name in names:
+        *path, attr = name.split(".")
+        parent = module
+        for part in path:
+            parent = getattr(parent, part, None)
+        if parent is not None and hasattr(parent, attr):
+            delattr(parent, attr)
+
+def _read_only(wav: np.ndarray) -> np.ndarray:
+    wav.setflags(write=False)
+    return wav
+
+
+def _until_cancelled(chunks: Generator, cancel: CancellationToken) -> Generator:
+    try:
+        for chunk in chunks:
+            cancel.raise_if_cancelled()
+            yield chunk
+    finally:
+        chunks.close()
+
+
+def save_ref_codes(path: str | Path, ref_codes: np.ndarray | torch.Tensor):
+    """Save precomputed reference codes (`.npy`, or `.pt` for NeuTTS-style voices)."""
+    path = Path(path)
+    if path.suffix == ".pt":
+        torch.save(torch.as_tensor(ref_codes).cpu(), path)
+    else:
+        np.save(path, np.asarray(torch.as_tensor(ref_codes).cpu(), dtype=np.int32))
+
+def encode_reference_audio(codec, ref_audio: AudioSource, sample_rate: int | None = None) -> torch.Tensor:
+    """Encode reference audio (see `utils.audio.load_audio`) to speech codes with a torch NeuCodec."""
+    wav = load_audio(ref_audio, sample_rate=sample_rate, target_sr=16000)
+    wav_tensor = torch.from_numpy(wav).float().unsqueeze(0).unsqueeze(0)  # [1, 1, T]
+    with torch.no_grad():
+        return codec.encode_code(audio_or_path=wav_tensor).squeeze(0).squeeze(0)
+
+def load_ref_codes(path: str | Path) -> np.ndarray:
+    """Load reference codes saved with `save_ref_codes` (`.npy` or `.pt`)."""
+    path = Path(path)
+    if path.suffix == ".pt":
+        return torch.load(path, map_location="cpu").numpy().astype(np.int32)
+    return np.load(path).astype(np.int32)
+
+class _GenerationTimer(BaseStreamer):
+    """
+    Splits backbone generation time into prefill (until the first new token) and decode.
+
+    Call `token()` per generated token and `finish()` at the end; as an HF `generate` streamer
+    (`skip_prompt=True`), the first `put` carries the prompt and is not counted.
+    """
+
+    def __init__(self, metrics: MetricsHook | None, skip_prompt: bool = False):
+        self.metrics = metrics
+        self._skip_prompt = skip_prompt
+        self._start = time.perf_counter()
+        self._first_token = None
+        self.n_tokens = 0
+
+    def token(self):
+        if self._first_token is None:
+            self._first_token = time.perf_counter()
+        self.n_tokens += 1
+
+    def put(self, value):
+        if self._skip_prompt:
+            self._skip_prompt = False
+            return
+        self.token()
+
+    def end(self):
+        pass
+
+    def finish(self, n_tokens: int | None = None):
+        if self.metrics is None:
+            return
+        end = time.perf_counter()
+        n_tokens = self.n_tokens if n_tokens is None else n_tokens
+        self.metrics.observe("generate_seconds", end - self._start)
+        self.metrics.observe("decode_tokens", n_tokens)
+        if self._first_token is not None:
+            self.metrics.observe("prefill_seconds", self._first_token - self._start)
+            self.metrics.observe("decode_seconds", end - self._first_token)
+            if n_tokens > 1 and end > self._first_token:
+                self.metrics.observe("tokens_per_second", (n_tokens - 1) / (end - self._first_token))
+
+class _CancelCriteria(StoppingCriteria):
+    """Stops HF `generate` after the current step once the token is cancelled."""
+
+    def __init__(self, cancel: CancellationToken):
+        self.cancel = cancel
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        return torch.full((input_ids.shape[0],), self.cancel.cancelled, dtype=torch.bool, device=input_ids.device)
+
 class VieNeuTTS:
     def __init__(
         self,
@@ -41,6 +220,22 @@ class VieNeuTTS:
         backbone_device="cpu",
         codec_repo="neuphonic/neucodec",
         codec_device="cpu",
+        backbone_quantization=None,
+        backbone_fast_decode=False,
+        backbone_dtype=None,
+        codec_dtype=None,
+        codec_encoder_repo=None,
+        codec_encoder_device=None,
+        decoder_only=False,
+        metrics=None,
+        prefix_cache_mb=256,
+        backbone_contexts=1,
+        backbone_threads=None,
+        context_timeout=None,
+        coalesce_requests=False,
+        decode_window_frames=None,
+        decode_context_frames=25,
+        decode_overlap_frames=2,
     ):
 
         # Constants
@@ -53,13 +248,71 @@ class VieNeuTTS:
         self.streaming_lookback = 50
         self.streaming_stride_samples = self.streaming_frames_per_chunk * self.hop_length
 
+        # Windowed codec decode for non-streaming outputs (None = decode the whole sequence at once):
+        # windows of `decode_window_frames` codes, each decoded with `decode_context_frames` of codes
+        # on both sides and cross-faded with its neighbours over 2 * `decode_overlap_frames`
+        if decode_window_frames is not None and decode_window_frames < 1:
+            raise ValueError("`decode_window_frames` must be at least 1 (or None to disable windowing).")
+        if decode_context_frames < 0 or decode_overlap_frames < 0:
+            raise ValueError("`decode_context_frames` and `decode_overlap_frames` must not be negative.")
+        self.decode_window_frames = decode_window_frames
+        self.decode_context_frames = decode_context_frames
+        self.decode_overlap_frames = decode_overlap_frames
+
         # ggml & onnx flags
         self._is_quantized_model = False
+        self._is_onnx_backbone = False
         self._is_onnx_codec = False
 
         # HF tokenizer
         self.tokenizer = None
 
+        # Torch backbone options
+        if backbone_quantization not in (None, "int8"):
+            raise ValueError(
+                f"Unsupported backbone quantization: {backbone_quantization}. Expected None or 'int8'."
+            )
+        self.backbone_quantization = backbone_quantization
+        self.backbone_fast_decode = backbone_fast_decode
+        self._static_cache = None
+        self._decode_step = None
+
+        # Weight precision (None keeps float32, "auto" picks bf16/fp16 where the device supports it)
+        self.backbone_dtype = _resolve_dtype(backbone_dtype, backbone_device)
+        self._backbone_dtype_auto = isinstance(backbone_dtype, str) and backbone_dtype == "auto"
+        self.codec_dtype = _resolve_dtype(codec_dtype, codec_device)
+        if backbone_quantization is not None and self.backbone_dtype != torch.float32:
+            raise ValueError("Int8 dynamic quantization requires a float32 backbone.")
+
+        # Bytes per loaded component, filled in by the loaders
+        self.memory_footprint: dict[str, int] = {}
+
+        # Codec encoder: shared with the torch codec by default, or a separate lazily loaded
+        # component (always for the onnx decoder, which has no encoder)
+        self.decoder_only = decoder_only
+        self._codec_encoder = None
+        self._codec_encoder_repo = codec_encoder_repo
+        self._codec_encoder_device = codec_encoder_device or codec_device
+        self._codec_encoder_lock = threading.Lock()
+
+        # Per-stage timings and sizes (see `vieneu_tts.metrics`)
+        self.metrics: MetricsHook | None = metrics
+
+        # Per-voice state for the shared prompt prefix (header + phonemized reference text)
+        self._prefix_cache = PrefixCache(int(prefix_cache_mb * 2**20)) if prefix_cache_mb else None
+
+        # GGUF: number of llama.cpp contexts serving requests concurrently, CPU threads shared
+        # between them (None = all cores) and how long a request waits for a free context
+        if backbone_contexts < 1:
+            raise ValueError("`backbone_contexts` must be at least 1.")
+        self.backbone_contexts = backbone_contexts
+        self.backbone_threads = backbone_threads
+        self.context_timeout = context_timeout
+        self._context_pool: ContextPool | None = None
+
+        # Identical concurrent `infer` / `infer_stream` calls share one generation
+        self._single_flight = SingleFlight() if coalesce_requests else None
+
         # Load models
         self._load_backbone(backbone_repo, backbone_device)
         self._load_codec(codec_repo, codec_device)
@@ -67,7 +320,23 @@ class VieNeuTTS:
     def _load_backbone(self, backbone_repo, backbone_device):
         print(f"Loading backbone from: {backbone_repo} on {backbone_device} ...")
 
+        if self.backbone_contexts > 1 and "gguf" not in backbone_repo.lower():
+            raise ValueError("`backbone_contexts` applies to GGUF backbones only.")
+
+        # "auto" picks nothing for GGUF / onnx backbones; only an explicit dtype is an error there
+        if self._backbone_dtype_auto and ("gguf" in backbone_repo.lower() or "onnx" in backbone_repo.lower()):
+            self.backbone_dtype = torch.float32
+
         if backbone_repo.lower().endswith("gguf") or "gguf" in backbone_repo.lower():
+            if self.backbone_quantization is not None:
+                raise ValueError(
+                    "`backbone_quantization` applies to the transformers backbone only; "
+                    "GGUF checkpoints are already quantized."
+                )
+            if self.backbone_fast_decode or self.backbone_dtype != torch.float32:
+                raise ValueError(
+                    "`backbone_fast_decode` and `backbone_dtype` apply to the transformers backbone only."
+                )
             try:
                 from llama_cpp import Llama
             except ImportError as e:
@@ -76,35 +345,119 @@ class VieNeuTTS:
                     "Please install it with:\n"
                     "    pip install llama-cpp-python"
                 ) from e
-            self.backbone = Llama.from_pretrained(
-                repo_id=backbone_repo,
-                filename="*.gguf",
+            llama_kwargs = dict(
                 verbose=False,
                 n_gpu_layers=-1 if backbone_device == "gpu" else 0,
                 n_ctx=self.max_context,
                 mlock=True,
                 flash_attn=True if backbone_device == "gpu" else False,
             )
+            if self.backbone_contexts > 1 or self.backbone_threads is not None:
+                total_threads = self.backbone_threads or os.cpu_count() or 1
+                llama_kwargs["n_threads"] = max(1, total_threads // self.backbone_contexts)
+                llama_kwargs["n_threads_batch"] = llama_kwargs["n_threads"]
+            self.backbone = Llama.from_pretrained(repo_id=backbone_repo, filename="*.gguf", **llama_kwargs)
+            # Extra contexts mmap the same file, so the weights are shared through the page cache
+            # (on GPU every context uploads its own copy)
+            contexts = [self.backbone] + [
+                Llama(model_path=self.backbone.model_path, **llama_kwargs)
+                for _ in range(self.backbone_contexts - 1)
+            ]
+            self._context_pool = ContextPool(contexts, timeout=self.context_timeout)
             self._is_quantized_model = True
-            
+            self._ggml_speech_end_id = self.backbone.tokenize(
+                b"<|SPEECH_GENERATION_END|>", add_bos=False, special=True
+            )[0]
+            self._record_footprint("backbone", _files_nbytes(self.backbone.model_path), "gguf file")
+
+        elif "onnx" in backbone_repo.lower():
+            if (
+                self.backbone_quantization is not None
+                or self.backbone_fast_decode
+                or self.backbone_dtype != torch.float32
+            ):
+                raise ValueError(
+                    "`backbone_quantization`, `backbone_fast_decode` and `backbone_dtype` "
+                    "apply to the transformers backbone only."
+                )
+            if backbone_device != "cpu":
+                raise ValueError("Onnx backbone only currently runs on CPU.")
+            from .onnx_backbone import OnnxBackbone
+
+            model_dir = Path(backbone_repo)
+            if not model_dir.exists():
+                from huggingface_hub import snapshot_download
+
+                model_dir = Path(snapshot_download(backbone_repo))
+            model_file = OnnxBackbone.find_model_file(model_dir)
+            self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+            self.backbone = OnnxBackbone(model_file)
+            self._is_onnx_backbone = True
+            self._record_footprint(
+                "backbone",
+                _files_nbytes(model_file, *model_file.parent.glob(f"{model_file.name}*data")),
+                "onnx file",
+            )
+
         else:
             self.tokenizer = AutoTokenizer.from_pretrained(backbone_repo)
-            self.backbone = AutoModelForCausalLM.from_pretrained(backbone_repo).to(
-                torch.device(backbone_device)
+            # Weights are read from mmap'd safetensors straight into the target dtype, without
+            # materializing a float32 copy first
+            self.backbone = AutoModelForCausalLM.from_pretrained(
+                backbone_repo,
+                dtype=self.backbone_dtype,
+                low_cpu_mem_usage=True,
+            ).to(torch.device(backbone_device))
+            self.backbone.eval()
+            if self.backbone_quantization == "int8":
+                self._quantize_backbone_int8(backbone_device)
+            if self.backbone_fast_decode:
+                self._setup_fast_decode()
+            self._record_footprint(
+                "backbone",
+                _module_nbytes(self.backbone),
+                self.backbone_quantization or str(self.backbone_dtype),
             )
+
+    def _quantize_backbone_int8(self, backbone_device):
+        """Apply dynamic int8 quantization to the linear layers of the torch backbone."""
+        if backbone_device != "cpu":
+            raise ValueError("Int8 dynamic quantization only runs on CPU.")
+        print("Applying int8 dynamic quantization to backbone linear layers ...")
+        self.backbone = torch.ao.quantization.quantize_dynamic(
+            self.backbone.eval(), {torch.nn.Linear}, dtype=torch.qint8
+        )
     
+    def _setup_fast_decode(self):
+        """Preallocate a static KV cache sized to `max_context` and compile the single-step decode."""
+        from transformers import StaticCache
+
+        print("Preparing static KV cache and compiled decode step ...")
+        param = next(self.backbone.parameters())
+        self._static_cache = StaticCache(
+            config=self.backbone.config,
+            max_cache_len=self.max_context,
+            max_batch_size=1,
+            device=param.device,
+            dtype=param.dtype if param.is_floating_point() else torch.float32,
+        )
+        mode = "reduce-overhead" if param.device.type == "cuda" else "default"
+        self._decode_step = torch.compile(self._fast_decode_step, mode=mode, fullgraph=True)
+
     def _load_codec(self, codec_repo, codec_device):
         print(f"Loading codec from: {codec_repo} on {codec_device} ...")
         match codec_repo:
-            case "neuphonic/neucodec":
-                self.codec = NeuCodec.from_pretrained(codec_repo)
-                self.codec.eval().to(codec_device)
-            case "neuphonic/distill-neucodec":
-                self.codec = DistillNeuCodec.from_pretrained(codec_repo)
-                self.codec.eval().to(codec_device)
+            case "neuphonic/neucodec" | "neuphonic/distill-neucodec":
+                self.codec = self._load_torch_codec(codec_repo, codec_device)
+                if self.decoder_only or self._codec_encoder_repo is not None:
+                    self._drop_codec_encoder()
+                else:
+                    self._codec_encoder = self.codec
             case "neuphonic/neucodec-onnx-decoder":
                 if codec_device != "cpu":
                     raise ValueError("Onnx decoder only currently runs on CPU.")
+                if self.codec_dtype != torch.float32:
+                    raise ValueError("`codec_dtype` applies to the torch codecs only.")
                 try:
                     from neucodec import NeuCodecOnnxDecoder
                 except ImportError as e:
@@ -117,7 +470,71 @@ class VieNeuTTS:
             case _:
                 raise ValueError(f"Unsupported codec repository: {codec_repo}")
 
-    def infer(self, text: str, ref_codes: np.ndarray | torch.Tensor, ref_text: str) -> np.ndarray:
+        if not self._is_onnx_codec:
+            detail = str(self.codec_dtype) + (", decoder only" if self._codec_encoder is None else "")
+            self._record_footprint("codec", _module_nbytes(self.codec), detail)
+
+    def _load_torch_codec(self, codec_repo, codec_device):
+        codec_cls = DistillNeuCodec if codec_repo == "neuphonic/distill-neucodec" else NeuCodec
+        codec = codec_cls.from_pretrained(codec_repo)
+        return codec.eval().to(codec_device, dtype=self.codec_dtype)
+
+    def _drop_codec_encoder(self):
+        """Free the encoder weights of the torch codec; decoding does not use them."""
+        _drop_submodules(self.codec, _CODEC_ENCODER_MODULES)
+        if str(self.codec.device).startswith("cuda"):
+            torch.cuda.empty_cache()
+
+    def _get_codec_encoder(self):
+        """Return the codec used by `encode_reference`, loading a separate encoder on first use."""
+        if self._codec_encoder is not None:
+            return self._codec_encoder
+        if self.decoder_only:
+            raise RuntimeError(
+                "This VieNeuTTS instance is decoder-only and cannot encode reference audio. "
+                "Pass precomputed ref codes (see `tools/encode_voices.py` and `load_ref_codes`)."
+            )
+        with self._codec_encoder_lock:
+            # Concurrent first calls: only one of them loads the encoder
+            if self._codec_encoder is None:
+                encoder_repo = self._codec_encoder_repo or "neuphonic/neucodec"
+                print(f"Loading codec encoder from: {encoder_repo} on {self._codec_encoder_device} ...")
+                encoder = self._load_torch_codec(encoder_repo, self._codec_encoder_device)
+                # Decoding goes through `self.codec`: free this copy's decoder weights
+                _drop_submodules(encoder, _CODEC_DECODER_MODULES)
+                self._record_footprint("codec_encoder", _module_nbytes(encoder), f"{self.codec_dtype}, encoder only")
+                self._codec_encoder = encoder
+        return self._codec_encoder
+
+    def _record_footprint(self, component: str, nbytes: int, detail: str):
+        self.memory_footprint[component] = nbytes
+        print(f"{component.replace('_', ' ').capitalize()} memory footprint: {nbytes / 2**20:.1f} MB ({detail})")
+
+    def _codec_autocast(self, codec=None):
+        """Autocast codec calls so float32 inputs run against reduced-precision codec weights."""
+        codec = self.codec if codec is None else codec
+        device_type = "cpu" if self._is_onnx_codec and codec is self.codec else codec.device.type
+        return torch.autocast(
+            device_type=device_type,
+            dtype=self.codec_dtype,
+            enabled=self.codec_dtype != torch.float32,
+        )
+
+    def _span(self, name: str):
+        return self.metrics.span(name) if self.metrics is not None else nullcontext()
+
+    def _observe(self, name: str, value: float):
+        if self.metrics is not None:
+            self.metrics.observe(name, value)
+
+    @property
+    def supports_streaming(self) -> bool:
+        """Whether `infer_stream` is available for the loaded backbone."""
+        return self._is_quantized_model
+
+    def infer(
+        self, text: str, ref_codes: np.ndarray | torch.Tensor, ref_text: str, cancel: CancellationToken | None = None
+    ) -> np.ndarray:
         """
         Perform inference to generate speech from text using the TTS model and reference audio.
 
@@ -125,23 +542,96 @@ class VieNeuTTS:
             text (str): Input text to be converted to speech.
             ref_codes (np.ndarray | torch.tensor): Encoded reference.
             ref_text (str): Reference text for reference audio. Defaults to None.
+            cancel (CancellationToken): Stops generation within one token once cancelled, raising
+                `GenerationCancelled`. Calls with a token are not coalesced.
         Returns:
-            np.ndarray: Generated speech waveform.
+            np.ndarray: Generated speech waveform (read-only when coalesced with other calls).
         """
+        if self._single_flight is None or cancel is not None:
+            return self._infer(text, ref_codes, ref_text, cancel)
 
-        # Generate tokens
-        if self._is_quantized_model:
-            output_str = self._infer_ggml(ref_codes, ref_text, text)
-        else:
-            prompt_ids = self._apply_chat_template(ref_codes, ref_text, text)
-            output_str = self._infer_torch(prompt_ids)
+        wav, shared = self._single_flight.do(
+            self._request_key("infer", text, ref_codes, ref_text),
+            lambda: _read_only(self._infer(text, ref_codes, ref_text)),
+        )
+        if shared:
+            self._observe("coalesced_requests", 1)
+        return wav
+
+    def _infer(
+        self, text: str, ref_codes: np.ndarray | torch.Tensor, ref_text: str, cancel: CancellationToken | None = None
+    ) -> np.ndarray:
+        with self._span("infer"):
+            # Generate tokens
+            output_str = self.generate_tokens(text, ref_codes, ref_text, cancel)
 
-        # Decode
-        wav = self._decode(output_str)
+            # Decode (window by window for long outputs, see `decode_window_frames`)
+            speech_ids = self._extract_speech_ids(output_str)
+            with self._span("codec_decode"):
+                if self._use_windowed_decode(len(speech_ids)):
+                    wav = self._decode_windowed(speech_ids)
+                else:
+                    wav = self._codec_decode(speech_ids)
 
+        self._observe("audio_seconds", len(wav) / self.sample_rate)
         return wav
 
-    def infer_stream(self, text: str, ref_codes: np.ndarray | torch.Tensor, ref_text: str) -> Generator[np.ndarray, None, None]:
+    def infer_batch(
+        self,
+        texts: list[str],
+        ref_codes: np.ndarray | torch.Tensor,
+        ref_text: str,
+        batch_size: int = 8,
+        cancel: CancellationToken | None = None,
+    ) -> list[np.ndarray]:
+        """
+        Generate speech for several texts with the same reference, decoding them together.
+
+        Speech tokens are generated per text; the codec then decodes up to `batch_size`
+        utterances per call (see `decode_batch`).
+
+        Args:
+            texts (list[str]): Input texts to be converted to speech.
+            ref_codes (np.ndarray | torch.tensor): Encoded reference.
+            ref_text (str): Reference text for reference audio.
+            batch_size (int): Maximum number of utterances per codec call.
+            cancel (CancellationToken): Checked every generated token.
+        Returns:
+            list[np.ndarray]: Generated speech waveforms, in the order of `texts`.
+        """
+        outputs = [self.generate_tokens(text, ref_codes, ref_text, cancel) for text in texts]
+        return self.decode_batch(outputs, batch_size=batch_size)
+
+    def generate_tokens(
+        self, text: str, ref_codes: np.ndarray | torch.Tensor, ref_text: str, cancel: CancellationToken | None = None
+    ) -> str:
+        """
+        Run the backbone only and return the generated speech token string (decode with `decode_batch`).
+        """
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if self._is_quantized_model:
+            return self._infer_ggml(ref_codes, ref_text, text, cancel)
+
+        prefix_ids, prefix_cache = self._prompt_prefix(ref_text)
+        prompt_ids = self._build_prompt_ids(prefix_ids, ref_codes, self._phonemize(text))
+        return self._generate_from_prompt_ids(prompt_ids, prefix_cache, cancel)
+
+    def _generate_from_prompt_ids(self, prompt_ids: list[int], prefix_cache=None, cancel: CancellationToken | None = None) -> str:
+        """
+        Run the transformers/onnx backbone on an already built prompt. `prefix_cache` holds the KV
+        cache of the prompt's first tokens (see `_prompt_prefix`); the onnx backbone ignores it.
+        """
+        if self._is_onnx_backbone:
+            return self._infer_onnx(prompt_ids, cancel)
+        elif self.backbone_fast_decode:
+            return self._infer_torch_static(prompt_ids, prefix_cache, cancel)
+        else:
+            return self._infer_torch(prompt_ids, prefix_cache, cancel)
+
+    def infer_stream(
+        self, text: str, ref_codes: np.ndarray | torch.Tensor, ref_text: str, cancel: CancellationToken | None = None
+    ) -> Generator[np.ndarray, None, None]:
         """
         Perform streaming inference to generate speech from text using the TTS model and reference audio.
 
@@ -149,79 +639,372 @@ class VieNeuTTS:
             text (str): Input text to be converted to speech.
             ref_codes (np.ndarray | torch.tensor): Encoded reference.
             ref_text (str): Reference text for reference audio. Defaults to None.
+            cancel (CancellationToken): Stops generation within one token once cancelled, raising
+                `GenerationCancelled`. A coalesced stream keeps running for its other consumers.
         Yields:
-            np.ndarray: Generated speech waveform.
+            np.ndarray: Generated speech waveform (read-only when coalesced with other calls).
         """
 
         if self._is_quantized_model:
-            return self._infer_stream_ggml(ref_codes, ref_text, text)
+            if self._single_flight is not None:
+                chunks, shared = self._single_flight.stream(
+                    self._request_key("infer_stream", text, ref_codes, ref_text),
+                    lambda stop: map(_read_only, self._infer_stream_ggml(ref_codes, ref_text, text, stop)),
+                )
+                if shared:
+                    self._observe("coalesced_requests", 1)
+                return chunks if cancel is None else _until_cancelled(chunks, cancel)
+            return self._infer_stream_ggml(ref_codes, ref_text, text, cancel)
+        elif self._is_onnx_backbone:
+            raise NotImplementedError("Streaming is not implemented for the onnx backend!")
         else:
             raise NotImplementedError("Streaming is not implemented for the torch backend!")
 
-    def encode_reference(self, ref_audio_path: str | Path):
-        wav, _ = librosa.load(ref_audio_path, sr=16000, mono=True)
-        wav_tensor = torch.from_numpy(wav).float().unsqueeze(0).unsqueeze(0)  # [1, 1, T]
-        with torch.no_grad():
-            ref_codes = self.codec.encode_code(audio_or_path=wav_tensor).squeeze(0).squeeze(0)
+    def infer_text_stream(
+        self,
+        fragments: Iterable[str],
+        ref_codes: np.ndarray | torch.Tensor,
+        ref_text: str,
+        max_chars: int = 256,
+        cancel: CancellationToken | None = None,
+    ) -> Generator[np.ndarray, None, None]:
+        """
+        Speak text while it is still being produced, e.g. an LLM reply streamed token by token.
+
+        Fragments are read on a background thread and cut into sentences/clauses as they complete
+        (see `utils.text_chunking.SentenceAccumulator`); each segment is synthesized as soon as it
+        is complete, with `infer_stream` where supported, and its audio yielded in order as one
+        continuous stream.
+
+        Args:
+            fragments (Iterable[str]): Text fragments, in order.
+            ref_codes (np.ndarray | torch.tensor): Encoded reference.
+            ref_text (str): Reference text for reference audio.
+            max_chars (int): Maximum characters per synthesized segment.
+            cancel (CancellationToken): Checked every generated token and between segments.
+        Yields:
+            np.ndarray: Generated speech waveform chunks.
+        """
+        segments: queue.Queue = queue.Queue()
+        stop = threading.Event()
+
+        def pull() -> Generator[str, None, None]:
+            # Stop reading the producer once the consumer is gone or the request is cancelled
+            source = iter(fragments)
+            for fragment in source:
+                if stop.is_set() or (cancel is not None and cancel.cancelled):
+                    if hasattr(source, "close"):
+                        source.close()
+                    return
+                yield fragment
+
+        def read():
+            # Keep consuming the producer while earlier segments are being synthesized
+            try:
+                for segment in iter_text_segments(pull(), max_chars=max_chars):
+                    segments.put(segment)
+                segments.put(None)
+            except BaseException as e:
+                segments.put(e)
+
+        threading.Thread(target=read, daemon=True).start()
+        try:
+            while (segment := segments.get()) is not None:
+                if isinstance(segment, BaseException):
+                    raise segment
+                yield from self._speak_segment(segment, ref_codes, ref_text, cancel)
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+        finally:
+            stop.set()
+
+    async def ainfer_text_stream(
+        self,
+        fragments: AsyncIterable[str],
+        ref_codes: np.ndarray | torch.Tensor,
+        ref_text: str,
+        max_chars: int = 256,
+        cancel: CancellationToken | None = None,
+    ) -> AsyncGenerator[np.ndarray, None]:
+        """
+        Async counterpart of `infer_text_stream` for async fragment sources. Synthesis runs in a
+        worker thread, so the event loop keeps serving the producer meanwhile.
+        """
+        segments: asyncio.Queue = asyncio.Queue()
+
+        async def pull() -> AsyncGenerator[str, None]:
+            # Stop reading the producer once the request is cancelled
+            async for fragment in fragments:
+                if cancel is not None and cancel.cancelled:
+                    return
+                yield fragment
+
+        async def read():
+            try:
+                async for segment in aiter_text_segments(pull(), max_chars=max_chars):
+                    await segments.put(segment)
+                await segments.put(None)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                await segments.put(e)
+
+        reader = asyncio.create_task(read())
+        audio = None
+        try:
+            while (segment := await segments.get()) is not None:
+                if isinstance(segment, BaseException):
+                    raise segment
+                audio = self._speak_segment(segment, ref_codes, ref_text, cancel)
+                while (chunk := await asyncio.to_thread(next, audio, None)) is not None:
+                    yield chunk
+                audio = None
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+        finally:
+            reader.cancel()
+            if audio is not None:
+                try:
+                    audio.close()
+                except ValueError:
+                    # Cancelled while a worker thread runs `next(audio)`: the generator is closed
+                    # when that step returns and it is garbage-collected
+                    pass
+
+    @staticmethod
+    def _request_key(kind: str, text: str, ref_codes: np.ndarray | torch.Tensor, ref_text: str) -> tuple:
+        """Identity of a synthesis request for coalescing: call kind, voice and normalized text."""
+        codes = np.asarray(torch.as_tensor(ref_codes).cpu(), dtype=np.int64)
+        voice = hashlib.sha1(codes.tobytes()).hexdigest()
+        return kind, voice, " ".join(ref_text.split()), " ".join(normalizer.normalize(text).split())
+
+    def _speak_segment(
+        self, segment: str, ref_codes: np.ndarray | torch.Tensor, ref_text: str, cancel: CancellationToken | None = None
+    ) -> Generator[np.ndarray, None, None]:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if self.supports_streaming:
+            yield from self.infer_stream(segment, ref_codes, ref_text, cancel)
+        else:
+            yield self.infer(segment, ref_codes, ref_text, cancel)
+
+    def encode_reference(self, ref_audio: AudioSource, sample_rate: int | None = None):
+        """
+        Encode reference audio to speech codes.
+
+        Args:
+            ref_audio: Path, encoded audio bytes, numpy waveform or `(sample_rate, waveform)` tuple.
+            sample_rate (int): Sample rate of a numpy `ref_audio`.
+        Returns:
+            torch.Tensor: Reference codes.
+        """
+        encoder = self._get_codec_encoder()
+        with self._codec_autocast(encoder):
+            ref_codes = encode_reference_audio(encoder, ref_audio, sample_rate=sample_rate)
         return ref_codes
 
-    def _decode(self, codes: str):
-        """Decode speech tokens to audio waveform."""
-        # Extract speech token IDs using regex
+    @staticmethod
+    def _extract_speech_ids(codes: str) -> list[int]:
+        """Extract speech token IDs from generated text."""
         speech_ids = [int(num) for num in re.findall(r"<\|speech_(\d+)\|>", codes)]
-        
+
         if len(speech_ids) == 0:
             raise ValueError(
                 "No valid speech tokens found in the output. "
                 "The model may not have generated proper speech tokens."
             )
-        
+        return speech_ids
+
+    def decode_batch(
+        self, codes: list[str | list[int]], batch_size: int = 8, max_pad_ratio: float = 0.1
+    ) -> list[np.ndarray]:
+        """
+        Decode several speech token sequences with as few codec calls as possible.
+
+        Sequences are sorted by length and padded (by repeating their last code) into
+        `[B, 1, T_max]` batches. The codec decoder attends over the whole sequence without a
+        padding mask, so padding slightly changes the output: a batch only takes sequences at
+        most `max_pad_ratio` longer than its shortest one. Every output is trimmed back to
+        `len(codes) * hop_length` samples.
+
+        Args:
+            codes (list[str | list[int]]): Generated token strings or speech token IDs.
+            batch_size (int): Maximum number of sequences per codec call.
+            max_pad_ratio (float): Maximum padding, relative to a sequence's own length
+                (0 only batches sequences of equal length).
+        Returns:
+            list[np.ndarray]: Waveforms, in the order of `codes`.
+        """
+        speech_ids = [self._extract_speech_ids(c) if isinstance(c, str) else list(c) for c in codes]
+        wavs: list[np.ndarray | None] = [None] * len(speech_ids)
+
+        # Sequences longer than a decode window are decoded window by window instead of batched
+        batches: list[list[int]] = []
+        for i in sorted(range(len(speech_ids)), key=lambda i: len(speech_ids[i])):
+            if self._use_windowed_decode(len(speech_ids[i])):
+                with self._span("codec_decode"):
+                    wavs[i] = self._decode_windowed(speech_ids[i])
+            elif (
+                batches
+                and len(batches[-1]) < batch_size
+                and len(speech_ids[i]) <= (1 + max_pad_ratio) * len(speech_ids[batches[-1][0]])
+            ):
+                batches[-1].append(i)
+            else:
+                batches.append([i])
+
+        for batch_idx in batches:
+            max_len = max(len(speech_ids[i]) for i in batch_idx)
+            padded = np.stack([
+                np.pad(speech_ids[i], (0, max_len - len(speech_ids[i])), mode="edge")
+                for i in batch_idx
+            ])[:, np.newaxis, :]
+
+            with self._span("codec_decode"):
+                if self._is_onnx_codec:
+                    recon = self.codec.decode_code(padded.astype(np.int32))
+                else:
+                    with torch.no_grad(), self._codec_autocast():
+                        batch_codes = torch.from_numpy(padded).long().to(self.codec.device)
+                        recon = self.codec.decode_code(batch_codes).float().cpu().numpy()
+
+            for row, i in enumerate(batch_idx):
+                wavs[i] = recon[row, 0, : len(speech_ids[i]) * self.hop_length]
+
+        return wavs
+
+    def _decode(self, codes: str):
+        """Decode speech tokens to audio waveform."""
+        # Extract speech token IDs using regex
+        speech_ids = self._extract_speech_ids(codes)
+
+        with self._span("codec_decode"):
+            return self._codec_decode(speech_ids)
+
+    def _codec_decode(self, speech_ids: list[int]) -> np.ndarray:
+        """One codec call on a single code sequence."""
         # Onnx decode
         if self._is_onnx_codec:
             codes = np.array(speech_ids, dtype=np.int32)[np.newaxis, np.newaxis, :]
             recon = self.codec.decode_code(codes)
         # Torch decode
         else:
-            with torch.no_grad():
+            with torch.no_grad(), self._codec_autocast():
                 codes = torch.tensor(speech_ids, dtype=torch.long)[None, None, :].to(
                     self.codec.device
                 )
-                recon = self.codec.decode_code(codes).cpu().numpy()
-        
+                recon = self.codec.decode_code(codes).float().cpu().numpy()
+
         return recon[0, 0, :]
+
+    def _use_windowed_decode(self, n_frames: int) -> bool:
+        if self.decode_window_frames is None:
+            return False
+        span = self.decode_window_frames + 2 * (self.decode_overlap_frames + self.decode_context_frames)
+        return n_frames > span
+
+    def _decode_windowed(self, speech_ids: list[int]) -> np.ndarray:
+        """
+        Decode a long sequence in windows, so each codec call sees at most
+        `decode_window_frames + 2 * (decode_overlap_frames + decode_context_frames)` codes.
+
+        Window k covers frames [k * W, k * W + W + 2 * overlap); it is decoded with
+        `decode_context_frames` extra codes on each side (discarded afterwards), and consecutive
+        windows are cross-faded with `_linear_overlap_add`, as in streaming.
+        """
+        n_frames = len(speech_ids)
+        window = self.decode_window_frames
+        overlap = self.decode_overlap_frames
+        context = self.decode_context_frames
+
+        frames = []
+        for frame_start in range(0, n_frames, window):
+            frame_end = min(frame_start + window + 2 * overlap, n_frames)
+            codes_start = max(frame_start - context, 0)
+            codes_end = min(frame_end + context, n_frames)
+            recon = self._codec_decode(speech_ids[codes_start:codes_end])
+            sample_start = (frame_start - codes_start) * self.hop_length
+            frames.append(recon[sample_start : sample_start + (frame_end - frame_start) * self.hop_length])
+            if frame_end == n_frames:
+                break
+
+        return _linear_overlap_add(frames, stride=window * self.hop_length)
     
+    def _phonemize(self, text: str) -> str:
+        with self._span("normalize"):
+            text = normalizer.normalize(text)
+        with self._span("phonemize"):
+            return phonemize_with_dict(text, normalize=False)
+
     def _apply_chat_template(self, ref_codes: list[int], ref_text: str, input_text: str) -> list[int]:
-        input_text = phonemize_with_dict(ref_text) + " " + phonemize_with_dict(input_text)
+        prefix_ids = self._prompt_prefix_ids(self._phonemize(ref_text))
+        return self._build_prompt_ids(prefix_ids, ref_codes, self._phonemize(input_text))
 
-        speech_replace = self.tokenizer.convert_tokens_to_ids("<|SPEECH_REPLACE|>")
-        speech_gen_start = self.tokenizer.convert_tokens_to_ids("<|SPEECH_GENERATION_START|>")
+    def _chat_template_ids(self) -> tuple[list[int], list[int]]:
+        """Chat template token ids before `<|TEXT_REPLACE|>`, and between it and `<|SPEECH_REPLACE|>`."""
         text_replace = self.tokenizer.convert_tokens_to_ids("<|TEXT_REPLACE|>")
-        text_prompt_start = self.tokenizer.convert_tokens_to_ids("<|TEXT_PROMPT_START|>")
-        text_prompt_end = self.tokenizer.convert_tokens_to_ids("<|TEXT_PROMPT_END|>")
-
-        input_ids = self.tokenizer.encode(input_text, add_special_tokens=False)
+        speech_replace = self.tokenizer.convert_tokens_to_ids("<|SPEECH_REPLACE|>")
         chat = """user: Convert the text to speech:<|TEXT_REPLACE|>\nassistant:<|SPEECH_REPLACE|>"""
         ids = self.tokenizer.encode(chat)
-
         text_replace_idx = ids.index(text_replace)
-        ids = (
-            ids[:text_replace_idx]
-            + [text_prompt_start]
-            + input_ids
-            + [text_prompt_end]
-            + ids[text_replace_idx + 1 :]  # noqa
-        )
+        return ids[:text_replace_idx], ids[text_replace_idx + 1 : ids.index(speech_replace)]
+
+    def _prompt_prefix_ids(self, ref_phonemes: str) -> list[int]:
+        """Prompt tokens shared by every request for a voice: chat header + phonemized reference text."""
+        head, _ = self._chat_template_ids()
+        text_prompt_start = self.tokenizer.convert_tokens_to_ids("<|TEXT_PROMPT_START|>")
+        return head + [text_prompt_start] + self.tokenizer.encode(ref_phonemes, add_special_tokens=False)
 
-        speech_replace_idx = ids.index(speech_replace)
+    def _build_prompt_ids(self, prefix_ids: list[int], ref_codes: list[int], input_phonemes: str) -> list[int]:
+        """Append the phonemized input text and the reference codes to the voice prefix."""
+        _, middle = self._chat_template_ids()
+        speech_gen_start = self.tokenizer.convert_tokens_to_ids("<|SPEECH_GENERATION_START|>")
+        text_prompt_end = self.tokenizer.convert_tokens_to_ids("<|TEXT_PROMPT_END|>")
+
+        input_ids = self.tokenizer.encode(" " + input_phonemes, add_special_tokens=False)
         codes_str = "".join([f"<|speech_{i}|>" for i in ref_codes])
         codes = self.tokenizer.encode(codes_str, add_special_tokens=False)
-        ids = ids[:speech_replace_idx] + [speech_gen_start] + list(codes)
+        ids = prefix_ids + input_ids + [text_prompt_end] + middle + [speech_gen_start] + list(codes)
 
+        self._observe("prompt_tokens", len(ids))
         return ids
 
-    def _infer_torch(self, prompt_ids: list[int]) -> str:
+    def _prompt_prefix(self, ref_text: str) -> tuple:
+        """
+        Prefix token ids for a voice and, for the torch backbone with the prefix cache enabled,
+        the `DynamicCache` holding their keys/values. Both are cached per reference text.
+        """
+        key = ("torch", ref_text)
+        cached = self._prefix_cache.get(key) if self._prefix_cache is not None else None
+        if cached is not None:
+            return cached
+
+        prefix_ids = self._prompt_prefix_ids(self._phonemize(ref_text))
+        if self._prefix_cache is None:
+            return prefix_ids, None
+
+        prefix_cache = None
+        nbytes = 8 * len(prefix_ids)
+        if not self._is_onnx_backbone:
+            device = next(self.backbone.parameters()).device
+            with torch.no_grad():
+                # Only the cache is kept: skip the vocab-sized logits of every prefix token
+                prefix_cache = self.backbone(
+                    input_ids=torch.tensor([prefix_ids], device=device),
+                    past_key_values=DynamicCache(),
+                    use_cache=True,
+                    logits_to_keep=1,
+                ).past_key_values
+            nbytes += sum(layer.keys.nbytes + layer.values.nbytes for layer in prefix_cache.layers)
+        self._prefix_cache.put(key, (prefix_ids, prefix_cache), nbytes)
+        return prefix_ids, prefix_cache
+
+    def _infer_torch(self, prompt_ids: list[int], prefix_cache=None, cancel: CancellationToken | None = None) -> str:
         prompt_tensor = torch.tensor(prompt_ids).unsqueeze(0).to(self.backbone.device)
+        # generate extends the cache in place: give every request its own copy of the voice prefix
+        past_key_values = copy.deepcopy(prefix_cache) if prefix_cache is not None else None
         speech_end_id = self.tokenizer.convert_tokens_to_ids("<|SPEECH_GENERATION_END|>")
+        timer = _GenerationTimer(self.metrics, skip_prompt=True)
         with torch.no_grad():
             output_tokens = self.backbone.generate(
                 prompt_tensor,
@@ -232,56 +1015,204 @@ class VieNeuTTS:
                 top_k=50,
                 use_cache=True,
                 min_new_tokens=50,
+                past_key_values=past_key_values,
+                streamer=timer if self.metrics is not None else None,
+                stopping_criteria=StoppingCriteriaList([_CancelCriteria(cancel)]) if cancel is not None else None,
             )
+        if cancel is not None:
+            cancel.raise_if_cancelled()
         input_length = prompt_tensor.shape[-1]
+        timer.finish(output_tokens.shape[-1] - input_length)
         output_str = self.tokenizer.decode(
             output_tokens[0, input_length:].cpu().numpy().tolist(), add_special_tokens=False
         )
         return output_str
 
-    def _infer_ggml(self, ref_codes: list[int], ref_text: str, input_text: str) -> str:
-        ref_text = phonemize_with_dict(ref_text)
-        input_text = phonemize_with_dict(input_text)
+    def _infer_onnx(self, prompt_ids: list[int], cancel: CancellationToken | None = None) -> str:
+        speech_end_id = self.tokenizer.convert_tokens_to_ids("<|SPEECH_GENERATION_END|>")
+        timer = _GenerationTimer(self.metrics)
 
-        codes_str = "".join([f"<|speech_{idx}|>" for idx in ref_codes])
-        prompt = (
-            f"user: Convert the text to speech:<|TEXT_PROMPT_START|>{ref_text} {input_text}"
-            f"<|TEXT_PROMPT_END|>\nassistant:<|SPEECH_GENERATION_START|>{codes_str}"
-        )
-        output = self.backbone(
-            prompt,
-            max_tokens=self.max_context,
+        def on_token():
+            timer.token()
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+
+        output_ids = self.backbone.generate(
+            prompt_ids,
+            max_length=self.max_context,
+            eos_token_id=speech_end_id,
             temperature=1.0,
             top_k=50,
-            stop=["<|SPEECH_GENERATION_END|>"],
+            min_new_tokens=50,
+            on_token=on_token if self.metrics is not None or cancel is not None else None,
         )
-        output_str = output["choices"][0]["text"]
-        return output_str
+        timer.finish()
+        return self.tokenizer.decode(output_ids, add_special_tokens=False)
+
+    @staticmethod
+    def _sample_top_k(logits: torch.Tensor, top_k: int, temperature: float) -> torch.Tensor:
+        """Top-k sampling that stays on the logits' device. Returns token ids of shape [B, 1]."""
+        values, indices = torch.topk(logits / temperature, top_k, dim=-1)
+        choice = torch.multinomial(torch.softmax(values, dim=-1), num_samples=1)
+        return indices.gather(-1, choice)
+
+    def _fast_decode_step(
+        self, input_ids: torch.Tensor, cache_position: torch.Tensor, logits_bias: torch.Tensor
+    ) -> torch.Tensor:
+        """Single decode step against the static KV cache, followed by on-device top-k sampling."""
+        logits = self.backbone(
+            input_ids=input_ids,
+            cache_position=cache_position,
+            past_key_values=self._static_cache,
+            use_cache=True,
+        ).logits[:, -1, :]
+        return self._sample_top_k(logits.float() + logits_bias, top_k=50, temperature=1.0)
+
+    def _infer_torch_static(self, prompt_ids: list[int], prefix_cache=None, cancel: CancellationToken | None = None) -> str:
+        """Same sampling as `_infer_torch`, but decoding through the static cache and compiled step."""
+        device = next(self.backbone.parameters()).device
+        speech_end_id = self.tokenizer.convert_tokens_to_ids("<|SPEECH_GENERATION_END|>")
+        min_new_tokens = 50
+        max_new_tokens = self.max_context - len(prompt_ids)
+        if max_new_tokens <= 0:
+            raise ValueError(
+                f"Prompt is {len(prompt_ids)} tokens, which does not fit the {self.max_context}-token context."
+            )
+
+        # EOS is masked out until `min_new_tokens` have been generated, like `min_new_tokens` in HF generate
+        vocab_size = self.backbone.config.vocab_size
+        no_bias = torch.zeros(vocab_size, device=device)
+        block_eos = no_bias.clone()
+        block_eos[speech_end_id] = float("-inf")
+
+        self._static_cache.reset()
+        n_cached = 0
+        if prefix_cache is not None:
+            # Copy the voice prefix into the static cache and prefill only the rest of the prompt
+            n_cached = prefix_cache.get_seq_length()
+            positions = {"cache_position": torch.arange(n_cached, device=device)}
+            for layer_idx, layer in enumerate(prefix_cache.layers):
+                self._static_cache.update(layer.keys, layer.values, layer_idx, positions)
+        prompt_tensor = torch.tensor(prompt_ids[n_cached:], device=device).unsqueeze(0)
+        output_ids: list[int] = []
+        timer = _GenerationTimer(self.metrics)
+        with torch.no_grad():
+            logits = self.backbone(
+                input_ids=prompt_tensor,
+                cache_position=torch.arange(n_cached, len(prompt_ids), device=device),
+                past_key_values=self._static_cache,
+                use_cache=True,
+            ).logits[:, -1, :]
+            next_token = self._sample_top_k(logits.float() + block_eos, top_k=50, temperature=1.0)
 
-    def _infer_stream_ggml(self, ref_codes: torch.Tensor, ref_text: str, input_text: str) -> Generator[np.ndarray, None, None]:
-        ref_text = phonemize_with_dict(ref_text)
-        input_text = phonemize_with_dict(input_text)
+            for step in range(max_new_tokens):
+                token_id = next_token.item()
+                timer.token()
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+                if token_id == speech_end_id:
+                    break
+                output_ids.append(token_id)
+                if step == max_new_tokens - 1:
+                    break
+                cache_position = torch.tensor([len(prompt_ids) + step], device=device)
+                bias = block_eos if step + 1 < min_new_tokens else no_bias
+                next_token = self._decode_step(next_token, cache_position, bias).clone()
+
+        timer.finish()
+        return self.tokenizer.decode(output_ids, add_special_tokens=False)
+
+    def _infer_ggml(self, ref_codes: list[int], ref_text: str, input_text: str, cancel: CancellationToken | None = None) -> str:
+        return "".join(self._generate_ggml(ref_codes, ref_text, input_text, temperature=1.0, cancel=cancel))
+
+    def _infer_stream_ggml(
+        self, ref_codes: torch.Tensor, ref_text: str, input_text: str, cancel: CancellationToken | None = None
+    ) -> Generator[np.ndarray, None, None]:
+        start_time = time.perf_counter()
+        tokens = self._generate_ggml(ref_codes, ref_text, input_text, temperature=0.2, cancel=cancel)
+        yield from self._stream_decode(ref_codes, tokens, start_time=start_time)
+
+    def _ggml_prefix(self, llm, ref_text: str) -> tuple:
+        """
+        Tokens of the prompt header + phonemized reference text, and (with the prefix cache
+        enabled) a llama.cpp state snapshot taken right after prefilling them on `llm`.
+        Snapshots are shared by all contexts of the pool.
+        """
+        key = ("ggml", ref_text)
+        cached = self._prefix_cache.get(key) if self._prefix_cache is not None else None
+        if cached is not None:
+            return cached
 
+        prefix = _PROMPT_HEADER + self._phonemize(ref_text)
+        prefix_tokens = llm.tokenize(prefix.encode("utf-8"), add_bos=True, special=True)
+        if self._prefix_cache is None:
+            return prefix_tokens, None
+
+        llm.reset()
+        llm.eval(prefix_tokens)
+        state = llm.save_state()
+        # The python-side logits copy (up to n_batch x n_vocab floats) is only used for logprobs;
+        # keep a single row, which `load_state` broadcasts back
+        state.scores = state.scores[-1:].copy()
+        nbytes = state.llama_state_size + state.scores.nbytes + state.input_ids.nbytes
+        self._prefix_cache.put(key, (prefix_tokens, state), nbytes)
+        return prefix_tokens, state
+
+    def _generate_ggml(
+        self, ref_codes: list[int], ref_text: str, input_text: str, temperature: float, cancel: CancellationToken | None = None
+    ) -> Generator[str, None, None]:
+        """
+        Generate speech token strings with llama.cpp, restoring the cached voice prefix if any.
+
+        A context is checked out of the pool for as long as the generator runs; closing the
+        generator early returns it.
+        """
         codes_str = "".join([f"<|speech_{idx}|>" for idx in ref_codes])
-        prompt = (
-            f"user: Convert the text to speech:<|TEXT_PROMPT_START|>{ref_text} {input_text}"
+        suffix = (
+            f" {self._phonemize(input_text)}"
             f"<|TEXT_PROMPT_END|>\nassistant:<|SPEECH_GENERATION_START|>{codes_str}"
         )
+        with self._context_pool.checkout() as llm:
+            prefix_tokens, state = self._ggml_prefix(llm, ref_text)
+            prompt_tokens = prefix_tokens + llm.tokenize(suffix.encode("utf-8"), add_bos=False, special=True)
+            self._observe("prompt_tokens", len(prompt_tokens))
+
+            if state is not None:
+                # `generate` finds the restored tokens as a prefix match and only prefills the suffix
+                llm.load_state(state)
 
+            stop_ids = {self._ggml_speech_end_id, llm.token_eos()}
+            max_new_tokens = self.max_context - len(prompt_tokens)
+            timer = _GenerationTimer(self.metrics)
+            for n_generated, token in enumerate(
+                llm.generate(prompt_tokens, top_k=50, top_p=0.95, min_p=0.05, temp=temperature, repeat_penalty=1.0)
+            ):
+                timer.token()
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+                if token in stop_ids or n_generated >= max_new_tokens:
+                    break
+                yield llm.detokenize([token], special=True).decode("utf-8", errors="ignore")
+            timer.finish()
+
+    def _stream_decode(
+        self, ref_codes: list[int], tokens: Iterable[str], start_time: float | None = None
+    ) -> Generator[np.ndarray, None, None]:
+        """
+        Decode a stream of generated speech token strings chunk by chunk.
+
+        Each chunk is decoded with `streaming_lookback` frames of left context (starting with the
+        reference codes) and `streaming_lookforward` frames of right context, and chunks are
+        cross-faded with `_linear_overlap_add`. Time to first audio is measured from `start_time`.
+        """
+        start_time = time.perf_counter() if start_time is None else start_time
+        chunk_start = start_time
         audio_cache: list[np.ndarray] = []
         token_cache: list[str] = [f"<|speech_{idx}|>" for idx in ref_codes]
         n_decoded_samples: int = 0
         n_decoded_tokens: int = len(ref_codes)
 
-        for item in self.backbone(
-            prompt,
-            max_tokens=self.max_context,
-            temperature=0.2,
-            top_k=50,
-            stop=["<|SPEECH_GENERATION_END|>"],
-            stream=True
-        ):
-            output_str = item["choices"][0]["text"]
+        for output_str in tokens:
             token_cache.append(output_str)
 
             if len(token_cache[n_decoded_tokens:]) >= self.streaming_frames_per_chunk + self.streaming_lookforward:
@@ -321,7 +1252,9 @@ class VieNeuTTS:
                 ]
                 n_decoded_samples = new_samples_end
                 n_decoded_tokens += self.streaming_frames_per_chunk
+                self._observe_stream_chunk(start_time, chunk_start, first=len(audio_cache) == 1)
                 yield processed_recon
+                chunk_start = time.perf_counter()
 
         # final decoding handled separately as non-constant chunk size
         remaining_tokens = len(token_cache) - n_decoded_tokens
@@ -344,4 +1277,14 @@ class VieNeuTTS:
 
             processed_recon = _linear_overlap_add(audio_cache, stride=self.streaming_stride_samples)
             processed_recon = processed_recon[n_decoded_samples:]
+            self._observe_stream_chunk(start_time, chunk_start, first=len(audio_cache) == 1)
             yield processed_recon
+
+    def _observe_stream_chunk(self, start_time: float, chunk_start: float, first: bool):
+        """Chunk latency excludes the time the consumer held the generator between chunks."""
+        if self.metrics is None:
+            return
+        now = time.perf_counter()
+        if first:
+            self.metrics.observe("time_to_first_audio_seconds", now - start_time)
+        self.metrics.observe("stream_chunk_seconds", now - chunk_start)